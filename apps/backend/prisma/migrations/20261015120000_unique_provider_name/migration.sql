@@ -0,0 +1,11 @@
+/*
+  Warnings:
+
+  - A unique constraint covering the columns `[name]` on the table `CeuProvider` will be added. If there are existing duplicate values, this will fail.
+
+*/
+-- DropIndex
+DROP INDEX "CeuProvider_name_idx";
+
+-- CreateIndex
+CREATE UNIQUE INDEX "CeuProvider_name_key" ON "CeuProvider"("name");
@@ -11,8 +11,8 @@ Provides common functionality for all provider spiders, including:
 
 import re
 import hashlib
+import time
 from abc import ABC
-from datetime import datetime
 from typing import Optional, Set, Dict, Any, List
 from urllib.parse import urlparse
 
@@ -20,7 +20,31 @@ import scrapy
 from scrapy.http import Response
 
 from .provider_registry import ProviderRegistry
-from .config_loader import ProviderConfig
+from .config_loader import ProviderConfig, compile_pattern
+
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
+try:
+    from pybloom_live import ScalableBloomFilter
+    HAS_BLOOM = True
+except ImportError:
+    HAS_BLOOM = False
+
+
+def content_hash(body: bytes) -> str:
+    """
+    Hash a response body for change detection.
+
+    Not a security hash: uses xxh3 (many times faster than MD5 on large
+    pages) when xxhash is installed, MD5 otherwise.
+    """
+    if HAS_XXHASH:
+        return xxhash.xxh3_64_hexdigest(body)
+    return hashlib.md5(body).hexdigest()
 
 
 class BaseHtmlCollectorSpider(scrapy.Spider, ABC):
@@ -106,7 +130,12 @@ class BaseHtmlCollectorSpider(scrapy.Spider, ABC):
 
         # Tracking state
         self.pages_crawled = 0
-        self.urls_seen: Set[str] = set()
+        # A Bloom filter holds seen URLs in a fraction of a set's memory; the
+        # rare false positive just skips one link, which a later crawl picks up
+        if HAS_BLOOM:
+            self.urls_seen = ScalableBloomFilter(initial_capacity=10000, error_rate=0.001)
+        else:
+            self.urls_seen: Set[str] = set()
         self.urls_stored: Set[str] = set()
 
         # Compile regex patterns for faster matching
@@ -158,25 +187,56 @@ class BaseHtmlCollectorSpider(scrapy.Spider, ABC):
         self._start_urls = value
 
     def _compile_patterns(self) -> Dict[str, List[re.Pattern]]:
-        """Compile URL patterns into regex for efficient matching."""
+        """
+        Compile URL patterns into regexes per pattern type.
+
+        Each type's patterns are joined into a single alternation, so
+        classifying a URL is one scan per type rather than one per pattern.
+        Patterns that are valid alone can still clash when joined (inline
+        flags such as (?i) not at the start, a group name used twice); such
+        a type falls back to one regex per pattern. Global skip patterns are
+        folded into 'skip'. Types with no patterns map to an empty list.
+        """
         patterns = {}
         for pattern_type in ['listing', 'course_detail', 'skip']:
             raw_patterns = self._config.crawl.patterns.get(pattern_type, [])
-            compiled = []
+            sources = []
             for p in raw_patterns:
-                try:
-                    # If pattern looks like a regex (contains \d, \w, etc.), compile it
-                    if any(c in p for c in ['\\d', '\\w', '\\s', '+', '*', '?', '^', '$']):
-                        compiled.append(re.compile(p, re.IGNORECASE))
-                    else:
-                        # Simple string pattern - escape and compile
-                        compiled.append(re.compile(re.escape(p), re.IGNORECASE))
-                except re.error:
-                    # Fall back to escaped literal
-                    compiled.append(re.compile(re.escape(p), re.IGNORECASE))
-            patterns[pattern_type] = compiled
+                # If pattern looks like a regex (contains \d, \w, etc.), use it as is
+                if any(c in p for c in ['\\d', '\\w', '\\s', '+', '*', '?', '^', '$']):
+                    try:
+                        compile_pattern(p, re.IGNORECASE)
+                        sources.append(p)
+                        continue
+                    except re.error:
+                        pass
+                # Simple string pattern (or invalid regex) - match literally
+                sources.append(re.escape(p))
+
+            if pattern_type == 'skip':
+                sources.extend(re.escape(p) for p in self.GLOBAL_SKIP_PATTERNS)
+
+            if not sources:
+                patterns[pattern_type] = []
+                continue
+            try:
+                patterns[pattern_type] = [
+                    re.compile('|'.join(f'(?:{p})' for p in sources), re.IGNORECASE)
+                ]
+            except re.error as e:
+                self.logger.warning(
+                    f"{pattern_type} patterns can't be combined ({e}), matching them one by one"
+                )
+                patterns[pattern_type] = [compile_pattern(p, re.IGNORECASE) for p in sources]
         return patterns
 
+    def _matches(self, pattern_type: str, url_lower: str) -> bool:
+        """Check a lowercased URL against the compiled patterns of one type."""
+        return any(
+            pattern.search(url_lower)
+            for pattern in self._compiled_patterns.get(pattern_type, ())
+        )
+
     def parse(self, response: Response):
         """
         Main parse method - handles all page types.
@@ -214,14 +274,12 @@ class BaseHtmlCollectorSpider(scrapy.Spider, ABC):
         url_lower = url.lower()
 
         # Check course detail patterns
-        for pattern in self._compiled_patterns.get('course_detail', []):
-            if pattern.search(url_lower):
-                return 'course_detail'
+        if self._matches('course_detail', url_lower):
+            return 'course_detail'
 
         # Check listing patterns
-        for pattern in self._compiled_patterns.get('listing', []):
-            if pattern.search(url_lower):
-                return 'listing'
+        if self._matches('listing', url_lower):
+            return 'listing'
 
         # Homepage check
         base_domain = self._config.base_domain
@@ -288,17 +346,8 @@ class BaseHtmlCollectorSpider(scrapy.Spider, ABC):
         """
         url_lower = url.lower()
 
-        # Check skip patterns from config
-        for pattern in self._compiled_patterns.get('skip', []):
-            if pattern.search(url_lower):
-                return False
-
-        # Check global skip patterns
-        for pattern in self.GLOBAL_SKIP_PATTERNS:
-            if pattern in url_lower:
-                return False
-
-        return True
+        # Check skip patterns from config and global skip patterns
+        return not self._matches('skip', url_lower)
 
     def _is_likely_course_page(self, url: str) -> bool:
         """
@@ -309,9 +358,8 @@ class BaseHtmlCollectorSpider(scrapy.Spider, ABC):
         url_lower = url.lower()
 
         # Check explicit course patterns
-        for pattern in self._compiled_patterns.get('course_detail', []):
-            if pattern.search(url_lower):
-                return True
+        if self._matches('course_detail', url_lower):
+            return True
 
         # Check if should be skipped
         if not self._should_follow_url(url):
@@ -339,8 +387,9 @@ class BaseHtmlCollectorSpider(scrapy.Spider, ABC):
             'source_url': response.meta.get('source_url'),
             'page_type': page_type,
             'provider': self.provider_name,
-            'crawled_at': datetime.utcnow().isoformat(),
-            'content_hash': hashlib.md5(response.body).hexdigest(),
+            # Raw epoch nanoseconds; storage formats it when writing
+            'crawled_at_ns': time.time_ns(),
+            'content_hash': content_hash(response.body),
         }
 
     def closed(self, reason: str):
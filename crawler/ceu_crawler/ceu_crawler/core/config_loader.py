@@ -7,12 +7,32 @@ for all configuration files.
 
 import os
 import re
+import sys
 import yaml
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
 
 
+# Compiled crawl.patterns entries, shared by the config validator and the
+# spiders so each distinct pattern is compiled once per process
+_compiled_patterns: Dict[Tuple[str, int], re.Pattern] = {}
+
+
+def compile_pattern(pattern: str, flags: int = 0) -> re.Pattern:
+    """
+    Compile a crawl URL pattern, reusing an earlier compilation if there is one.
+
+    Raises re.error for an invalid pattern; failures are not cached.
+    """
+    key = (pattern, flags)
+    compiled = _compiled_patterns.get(key)
+    if compiled is None:
+        compiled = re.compile(pattern, flags)
+        _compiled_patterns[key] = compiled
+    return compiled
+
+
 @dataclass
 class CrawlConfig:
     """Crawl-specific configuration for a provider."""
@@ -23,6 +43,7 @@ class CrawlConfig:
     concurrent_requests_per_domain: int = 1
     depth_limit: int = 3
     robotstxt_obey: bool = True
+    http2: bool = False
     autothrottle: Dict[str, Any] = field(default_factory=dict)
     patterns: Dict[str, List[str]] = field(default_factory=dict)
 
@@ -70,6 +91,13 @@ class ProviderConfig:
             'ROBOTSTXT_OBEY': self.crawl.robotstxt_obey,
         }
 
+        # Scrapy's HTTP/2 handler needs h2 negotiated over ALPN and has no
+        # HTTP/1.1 fallback, so it is only used for hosts known to speak h2
+        if self.crawl.http2:
+            settings['DOWNLOAD_HANDLERS'] = {
+                'https': 'scrapy.core.downloader.handlers.http2.H2DownloadHandler',
+            }
+
         if self.crawl.autothrottle:
             settings['AUTOTHROTTLE_ENABLED'] = self.crawl.autothrottle.get('enabled', True)
             settings['AUTOTHROTTLE_START_DELAY'] = self.crawl.autothrottle.get('start_delay', 3)
@@ -160,6 +188,21 @@ class ConfigLoader:
             return [self._interpolate_env_vars(v) for v in value]
         return value
 
+    def _intern_strings(self, value: Any) -> Any:
+        """
+        Recursively intern string values in config data.
+
+        Providers repeat the same selectors, patterns and hosts, so interned
+        copies are shared across every loaded config.
+        """
+        if isinstance(value, str):
+            return sys.intern(value)
+        elif isinstance(value, dict):
+            return {k: self._intern_strings(v) for k, v in value.items()}
+        elif isinstance(value, list):
+            return [self._intern_strings(v) for v in value]
+        return value
+
     def _load_yaml(self, file_path: Path, interpolate: bool = True) -> Dict[str, Any]:
         """Load and parse a YAML file."""
         if not file_path.exists():
@@ -188,7 +231,7 @@ class ConfigLoader:
             ValueError: If config validation fails
         """
         file_path = self.providers_dir / f"{provider_name}.yaml"
-        data = self._load_yaml(file_path)
+        data = self._intern_strings(self._load_yaml(file_path))
 
         return self._parse_provider_config(data, provider_name)
 
@@ -263,6 +306,7 @@ class ConfigLoader:
             concurrent_requests_per_domain=crawl_data.get('concurrent_requests_per_domain', 1),
             depth_limit=crawl_data.get('depth_limit', 3),
             robotstxt_obey=crawl_data.get('robotstxt_obey', True),
+            http2=crawl_data.get('http2', False),
             autothrottle=crawl_data.get('autothrottle', {}),
             patterns=crawl_data.get('patterns', {}),
         )
@@ -1,17 +1,89 @@
-import psycopg2
 from psycopg2.extras import RealDictCursor
 from itemadapter import ItemAdapter
+from datetime import datetime
+from twisted.internet import task, threads
+from twisted.internet.defer import DeferredLock, succeed
 import logging
+import time
+
+from ceu_crawler.core.db import connect
+
+
+# Enum values accepted by the CeuCourse "field" and "courseType" columns
+COURSE_FIELDS = frozenset({
+    'mental_health', 'psychology', 'counseling', 'nursing', 'social_work', 'other'
+})
+COURSE_TYPES = frozenset({'live_webinar', 'in_person', 'on_demand', 'self_paced'})
+
+# Statement text is built once at import time rather than per item
+INSERT_COURSE_SQL = """
+    INSERT INTO "CeuCourse" (
+        id, "providerId", title, url, description, instructors,
+        price, "originalPrice", "priceString",
+        credits, "creditsString",
+        duration, "durationString",
+        category, field, date, "imageUrl",
+        "courseType", "startDate", "endDate", "registrationDeadline",
+        "scrapedAt"
+    )
+    VALUES (
+        gen_random_uuid(), %s, %s, %s, %s, %s,
+        %s, %s, %s,
+        %s, %s,
+        %s, %s,
+        %s, %s, %s, %s,
+        %s, %s, %s, %s,
+        %s
+    )
+"""
+
+# Get or create in one round-trip; xmax = 0 only for freshly inserted rows
+UPSERT_PROVIDER_SQL = """
+    INSERT INTO "CeuProvider" (id, name, "baseUrl", active)
+    VALUES (gen_random_uuid(), %s, %s, true)
+    ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+    RETURNING id, (xmax = 0) AS inserted
+"""
+
+SELECT_COURSE_ID_SQL = 'SELECT id FROM "CeuCourse" WHERE url = %s'
+
+UPDATE_COURSE_SQL = """
+    UPDATE "CeuCourse"
+    SET title = %s, description = %s, instructors = %s,
+        price = %s, "originalPrice" = %s, "priceString" = %s,
+        credits = %s, "creditsString" = %s,
+        duration = %s, "durationString" = %s,
+        category = %s, field = %s, date = %s, "imageUrl" = %s,
+        "courseType" = %s, "startDate" = %s, "endDate" = %s, "registrationDeadline" = %s,
+        "scrapedAt" = %s
+    WHERE id = %s
+"""
 
 
 class DatabasePipeline:
     """
     Pipeline to store scraped courses in PostgreSQL database
+
+    Writes are grouped into transactions that commit every BATCH_COMMIT
+    items or COMMIT_INTERVAL seconds, whichever comes first. A timer
+    commits on the interval even while no items arrive, so a slow or idle
+    crawl doesn't leave writes sitting in an open transaction.
+
+    Database work runs in the reactor thread pool, one item at a time, so
+    the crawl keeps dispatching requests while a write is in flight.
     """
+
+    BATCH_COMMIT = 200
+    COMMIT_INTERVAL = 1.0  # seconds
     
     def __init__(self):
         self.conn = None
         self.cursor = None
+        self.provider_cache = {}  # Cache provider IDs
+        self._pending = 0
+        self._last_commit = time.monotonic()
+        self._write_lock = DeferredLock()
+        self._commit_loop = None
         
     def open_spider(self, spider):
         """Open database connection when spider starts"""
@@ -19,21 +91,37 @@ class DatabasePipeline:
             # Get database connection details from settings or environment
             db_config = spider.settings.get('DATABASE_CONFIG', {})
             
-            self.conn = psycopg2.connect(
-                host=db_config.get('host', 'localhost'),
-                port=db_config.get('port', 5432),
-                database=db_config.get('database', 'ceu_db'),
-                user=db_config.get('user', 'postgres'),
-                password=db_config.get('password', 'postgres')
-            )
+            self.conn = connect(db_config)
             self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+
+            # Load every known provider up front so lookups skip the database
+            self.cursor.execute('SELECT id, name FROM "CeuProvider"')
+            self.provider_cache = {row['name']: row['id'] for row in self.cursor.fetchall()}
             spider.logger.info('Database connection opened')
+
+            self._commit_loop = task.LoopingCall(
+                self._write_lock.run, threads.deferToThread, self._commit_if_due
+            )
+            self._commit_loop.start(self.COMMIT_INTERVAL, now=False).addErrback(
+                lambda failure: spider.logger.error(f'Periodic commit failed: {failure.value}')
+            )
         except Exception as e:
             spider.logger.error(f'Failed to open database connection: {e}')
             raise
     
     def close_spider(self, spider):
-        """Close database connection when spider closes"""
+        """Commit pending writes and close database connection when spider closes"""
+        if self._commit_loop and self._commit_loop.running:
+            self._commit_loop.stop()
+        if self.conn and self._pending:
+            d = self._write_lock.run(threads.deferToThread, self._commit)
+        else:
+            d = succeed(None)
+        d.addBoth(lambda _: self._close(spider))
+        return d
+
+    def _close(self, spider):
+        """Close cursor and connection"""
         if self.cursor:
             self.cursor.close()
         if self.conn:
@@ -43,8 +131,16 @@ class DatabasePipeline:
     def process_item(self, item, spider):
         """Process and store item in database"""
         adapter = ItemAdapter(item)
-        
+        d = self._write_lock.run(threads.deferToThread, self._store, adapter, spider)
+        d.addCallback(lambda _: item)
+        return d
+
+    def _store(self, adapter, spider):
+        """Write one item inside the current batch (runs in a worker thread)"""
         try:
+            # Savepoint so a failing item doesn't abort the whole batch
+            self.cursor.execute('SAVEPOINT item')
+
             # First, get or create the provider
             provider_id = self._get_or_create_provider(adapter, spider)
             
@@ -57,60 +153,75 @@ class DatabasePipeline:
             else:
                 # Insert new course
                 self._insert_course(adapter, provider_id, spider)
+
+            self.cursor.execute('RELEASE SAVEPOINT item')
+            self._pending += 1
+
+            # Cached only now: a rolled-back savepoint would also undo a
+            # provider row created for this item
+            self.provider_cache[adapter.get('provider', 'pesi')] = provider_id
                 
         except Exception as e:
             spider.logger.error(f'Error processing item: {e}')
+            self.cursor.execute('ROLLBACK TO SAVEPOINT item')
             # Don't fail the item, just log the error
-        
-        return item
+
+        if self._pending >= self.BATCH_COMMIT:
+            self._commit()
+        else:
+            self._commit_if_due()
+
+    def _commit_if_due(self):
+        """Commit pending writes once COMMIT_INTERVAL has passed since the last commit"""
+        if self._pending and time.monotonic() - self._last_commit >= self.COMMIT_INTERVAL:
+            self._commit()
+
+    def _commit(self):
+        """Commit the current batch of writes"""
+        self.conn.commit()
+        self._pending = 0
+        self._last_commit = time.monotonic()
     
     def _get_or_create_provider(self, adapter, spider):
         """Get or create CEU provider"""
         provider_name = adapter.get('provider', 'pesi')
-        
-        # Check if provider exists
-        self.cursor.execute(
-            'SELECT id FROM "CeuProvider" WHERE name = %s',
-            (provider_name,)
-        )
-        result = self.cursor.fetchone()
-        
-        if result:
-            return result['id']
-        
-        # Create new provider
+        if provider_name in self.provider_cache:
+            return self.provider_cache[provider_name]
+
         base_url = adapter.get('source_url', '').split('/')[2] if adapter.get('source_url') else ''
         
-        self.cursor.execute(
-            """
-            INSERT INTO "CeuProvider" (id, name, "baseUrl", active)
-            VALUES (gen_random_uuid(), %s, %s, true)
-            RETURNING id
-            """,
-            (provider_name, base_url)
-        )
-        provider_id = self.cursor.fetchone()['id']
-        self.conn.commit()
-        spider.logger.info(f'Created new provider: {provider_name}')
+        self.cursor.execute(UPSERT_PROVIDER_SQL, (provider_name, base_url))
+        result = self.cursor.fetchone()
         
-        return provider_id
+        if result['inserted']:
+            spider.logger.info(f'Created new provider: {provider_name}')
+
+        return result['id']
     
     def _get_course_id_by_url(self, url, spider):
         """Check if course already exists by URL"""
         if not url:
             return None
         
-        self.cursor.execute(
-            'SELECT id FROM "CeuCourse" WHERE url = %s',
-            (url,)
-        )
+        self.cursor.execute(SELECT_COURSE_ID_SQL, (url,))
         result = self.cursor.fetchone()
         
         return result['id'] if result else None
     
+    def _map_enums(self, adapter):
+        """Map field and course type onto valid enum values"""
+        field = adapter.get('field', 'other')
+        if field not in COURSE_FIELDS:
+            field = 'other'
+
+        course_type = adapter.get('course_type', 'on_demand')
+        if course_type not in COURSE_TYPES:
+            course_type = 'on_demand'
+
+        return field, course_type
+
     def _parse_datetime(self, date_str):
         """Parse ISO datetime string to datetime object"""
-        from datetime import datetime
         if not date_str:
             return None
         try:
@@ -120,27 +231,7 @@ class DatabasePipeline:
 
     def _insert_course(self, adapter, provider_id, spider):
         """Insert new course into database"""
-        from datetime import datetime
-
-        # Map field values
-        field_mapping = {
-            'mental_health': 'mental_health',
-            'psychology': 'psychology',
-            'counseling': 'counseling',
-            'nursing': 'nursing',
-            'social_work': 'social_work',
-            'other': 'other'
-        }
-        field = field_mapping.get(adapter.get('field', 'other'), 'other')
-
-        # Map course type values
-        course_type_mapping = {
-            'live_webinar': 'live_webinar',
-            'in_person': 'in_person',
-            'on_demand': 'on_demand',
-            'self_paced': 'self_paced'
-        }
-        course_type = course_type_mapping.get(adapter.get('course_type', 'on_demand'), 'on_demand')
+        field, course_type = self._map_enums(adapter)
 
         # Parse dates
         start_date = self._parse_datetime(adapter.get('start_date'))
@@ -148,27 +239,7 @@ class DatabasePipeline:
         registration_deadline = self._parse_datetime(adapter.get('registration_deadline'))
 
         self.cursor.execute(
-            """
-            INSERT INTO "CeuCourse" (
-                id, "providerId", title, url, description, instructors,
-                price, "originalPrice", "priceString",
-                credits, "creditsString",
-                duration, "durationString",
-                category, field, date, "imageUrl",
-                "courseType", "startDate", "endDate", "registrationDeadline",
-                "scrapedAt"
-            )
-            VALUES (
-                gen_random_uuid(), %s, %s, %s, %s, %s,
-                %s, %s, %s,
-                %s, %s,
-                %s, %s,
-                %s, %s, %s, %s,
-                %s, %s, %s, %s,
-                %s
-            )
-            RETURNING id
-            """,
+            INSERT_COURSE_SQL,
             (
                 provider_id,
                 adapter.get('title'),
@@ -196,32 +267,11 @@ class DatabasePipeline:
                 datetime.now()
             )
         )
-        course_id = self.cursor.fetchone()['id']
-        self.conn.commit()
         spider.logger.info(f'Inserted new course: {adapter.get("title")}')
     
     def _update_course(self, course_id, adapter, provider_id, spider):
         """Update existing course"""
-        from datetime import datetime
-
-        field_mapping = {
-            'mental_health': 'mental_health',
-            'psychology': 'psychology',
-            'counseling': 'counseling',
-            'nursing': 'nursing',
-            'social_work': 'social_work',
-            'other': 'other'
-        }
-        field = field_mapping.get(adapter.get('field', 'other'), 'other')
-
-        # Map course type values
-        course_type_mapping = {
-            'live_webinar': 'live_webinar',
-            'in_person': 'in_person',
-            'on_demand': 'on_demand',
-            'self_paced': 'self_paced'
-        }
-        course_type = course_type_mapping.get(adapter.get('course_type', 'on_demand'), 'on_demand')
+        field, course_type = self._map_enums(adapter)
 
         # Parse dates
         start_date = self._parse_datetime(adapter.get('start_date'))
@@ -229,17 +279,7 @@ class DatabasePipeline:
         registration_deadline = self._parse_datetime(adapter.get('registration_deadline'))
 
         self.cursor.execute(
-            """
-            UPDATE "CeuCourse"
-            SET title = %s, description = %s, instructors = %s,
-                price = %s, "originalPrice" = %s, "priceString" = %s,
-                credits = %s, "creditsString" = %s,
-                duration = %s, "durationString" = %s,
-                category = %s, field = %s, date = %s, "imageUrl" = %s,
-                "courseType" = %s, "startDate" = %s, "endDate" = %s, "registrationDeadline" = %s,
-                "scrapedAt" = %s
-            WHERE id = %s
-            """,
+            UPDATE_COURSE_SQL,
             (
                 adapter.get('title'),
                 adapter.get('description'),
@@ -263,5 +303,4 @@ class DatabasePipeline:
                 course_id
             )
         )
-        self.conn.commit()
         spider.logger.info(f'Updated course: {adapter.get("title")}')
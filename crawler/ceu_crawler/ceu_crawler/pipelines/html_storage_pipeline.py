@@ -4,174 +4,358 @@ HTML Storage Pipeline
 Stores raw HTML content in PostgreSQL for later processing.
 Part of the two-phase crawling architecture.
 """
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import csv
+import io
+import re
+from collections import OrderedDict
+
+from psycopg2.extras import execute_batch, execute_values
 from itemadapter import ItemAdapter
 from datetime import datetime
+from twisted.internet import threads
+from twisted.internet.defer import DeferredLock, succeed
+
+from ceu_crawler.core.db import ensure_indexes, get_pool, uses_pgbouncer
+
+
+# Inline scripts, stylesheets and comments carry nothing the extractor reads,
+# so they are dropped before storage. JSON-LD scripts are kept: TextExtractor
+# pulls structured course data out of them.
+STRIP_HTML_RE = re.compile(
+    r'<script\b(?![^>]*application/ld\+json)[^>]*>.*?</script\s*>'
+    r'|<style\b[^>]*>.*?</style\s*>'
+    r'|<!--.*?-->',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Insert-or-refresh a crawled page; re-crawled URLs go back to pending
+UPSERT_RAW_SQL = """
+    INSERT INTO "RawCrawlData" (
+        id, url, "providerId", "htmlContent", "httpStatus",
+        "contentType", "crawledAt", status, "sourceUrl", "pageType"
+    )
+    VALUES %s
+    ON CONFLICT (url) DO UPDATE
+    SET "htmlContent" = EXCLUDED."htmlContent",
+        "httpStatus" = EXCLUDED."httpStatus",
+        "contentType" = EXCLUDED."contentType",
+        "crawledAt" = EXCLUDED."crawledAt",
+        status = 'pending',
+        "sourceUrl" = EXCLUDED."sourceUrl",
+        "pageType" = EXCLUDED."pageType",
+        "processedAt" = NULL,
+        "extractedData" = NULL,
+        "extractionMeta" = NULL
+"""
+
+UPSERT_RAW_TEMPLATE = "(gen_random_uuid(), %s, %s, %s, %s, %s, %s, 'pending', %s, %s)"
+
+# Server-side prepared form of the single-row upsert, parsed and planned once
+# per connection; batches are sent as EXECUTEs joined into one round-trip
+PREPARE_UPSERT_SQL = """
+    PREPARE raw_upsert (text, text, text, integer, text, timestamp, text, text) AS
+    INSERT INTO "RawCrawlData" (
+        id, url, "providerId", "htmlContent", "httpStatus",
+        "contentType", "crawledAt", status, "sourceUrl", "pageType"
+    )
+    VALUES (gen_random_uuid(), $1, $2, $3, $4, $5, $6, 'pending', $7, $8)
+    ON CONFLICT (url) DO UPDATE
+    SET "htmlContent" = EXCLUDED."htmlContent",
+        "httpStatus" = EXCLUDED."httpStatus",
+        "contentType" = EXCLUDED."contentType",
+        "crawledAt" = EXCLUDED."crawledAt",
+        status = 'pending',
+        "sourceUrl" = EXCLUDED."sourceUrl",
+        "pageType" = EXCLUDED."pageType",
+        "processedAt" = NULL,
+        "extractedData" = NULL,
+        "extractionMeta" = NULL
+"""
+
+EXECUTE_UPSERT_SQL = 'EXECUTE raw_upsert (%s, %s, %s, %s, %s, %s, %s, %s)'
+
+# Bulk-load path: COPY into a session-local staging table, then upsert from it
+STAGE_COLUMNS = (
+    'url, "providerId", "htmlContent", "httpStatus", '
+    '"contentType", "crawledAt", "sourceUrl", "pageType"'
+)
+
+CREATE_STAGE_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS raw_stage (
+        url text,
+        "providerId" text,
+        "htmlContent" text,
+        "httpStatus" integer,
+        "contentType" text,
+        "crawledAt" timestamp,
+        "sourceUrl" text,
+        "pageType" text
+    ) ON COMMIT DELETE ROWS
+"""
+
+# csv writes None and '' alike as an empty field, which COPY would read as NULL
+# for both, so NULLs are written as an explicit unquoted \N marker instead
+COPY_NULL = '\\N'
+COPY_STAGE_SQL = (
+    f'COPY raw_stage ({STAGE_COLUMNS}) FROM STDIN WITH '
+    f"(FORMAT csv, NULL '{COPY_NULL}')"
+)
+
+UPSERT_FROM_STAGE_SQL = """
+    INSERT INTO "RawCrawlData" (
+        id, url, "providerId", "htmlContent", "httpStatus",
+        "contentType", "crawledAt", status, "sourceUrl", "pageType"
+    )
+    SELECT gen_random_uuid(), url, "providerId", "htmlContent", "httpStatus",
+           "contentType", "crawledAt", 'pending', "sourceUrl", "pageType"
+    FROM raw_stage
+    ON CONFLICT (url) DO UPDATE
+    SET "htmlContent" = EXCLUDED."htmlContent",
+        "httpStatus" = EXCLUDED."httpStatus",
+        "contentType" = EXCLUDED."contentType",
+        "crawledAt" = EXCLUDED."crawledAt",
+        status = 'pending',
+        "sourceUrl" = EXCLUDED."sourceUrl",
+        "pageType" = EXCLUDED."pageType",
+        "processedAt" = NULL,
+        "extractedData" = NULL,
+        "extractionMeta" = NULL
+"""
+
+# Get or create in one round-trip; xmax = 0 only for freshly inserted rows
+UPSERT_PROVIDER_SQL = """
+    INSERT INTO "CeuProvider" (id, name, "baseUrl", active)
+    VALUES (gen_random_uuid(), %s, %s, true)
+    ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+    RETURNING id, (xmax = 0) AS inserted
+"""
 
 
 class HtmlStoragePipeline:
     """
     Pipeline to store raw HTML content in the RawCrawlData table.
+
+    Items are buffered and written BATCH_SIZE at a time with a single
+    multi-row upsert, committing once per batch. With HTML_STORAGE_COPY
+    enabled (for backfills), batches are COPY'd into a staging table and
+    upserted from there instead. A batch that fails is retried row by row,
+    so one bad page doesn't take the rest of the batch down with it.
+
+    All database work runs in the reactor thread pool, one batch at a time,
+    so the crawl keeps scheduling requests while a batch is in flight.
     """
 
+    BATCH_SIZE = 500
+    PROVIDER_CACHE_SIZE = 1024
+
     def __init__(self):
+        self.pool = None
         self.conn = None
         self.cursor = None
-        self.provider_cache = {}  # Cache provider IDs
+        self.provider_cache = OrderedDict()  # LRU of provider name -> ID
+        self._buffer = {}  # url -> row; keyed so a batch never upserts a URL twice
+        self._write_lock = DeferredLock()
+        self._prepared = False
+        self._use_copy = False
+        self._strip_html = True
+        self._session_state = False  # PREPARE/temp table/SET applied to the connection
 
     def open_spider(self, spider):
         """Open database connection when spider starts"""
         try:
             db_config = spider.settings.get('DATABASE_CONFIG', {})
 
-            self.conn = psycopg2.connect(
-                host=db_config.get('host', 'localhost'),
-                port=db_config.get('port', 5432),
-                database=db_config.get('database', 'ceu_db'),
-                user=db_config.get('user', 'postgres'),
-                password=db_config.get('password', 'postgres')
-            )
-            self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+            self._strip_html = spider.settings.getbool('HTML_STORAGE_STRIP', True)
+
+            self.pool = get_pool(db_config)
+            self.conn = self.pool.getconn()
+            # Plain tuple cursor: the write path only ever reads back one or two columns
+            self.cursor = self.conn.cursor()
+
+            # Transaction pooling can hand each transaction a different server
+            # backend, so session-level PREPARE / temp tables / SET can't be used
+            if uses_pgbouncer(db_config):
+                spider.logger.info('HTML Storage Pipeline: PgBouncer detected, using plain upserts')
+            else:
+                self._setup_session(spider)
+
+            ensure_indexes(self.conn)
+
+            # Load known providers up front; the table is tiny
+            self.cursor.execute('SELECT id, name FROM "CeuProvider"')
+            for provider_id, name in self.cursor.fetchall():
+                self._cache_provider(name, provider_id)
+            self.conn.commit()
+
             spider.logger.info('HTML Storage Pipeline: Database connection opened')
         except Exception as e:
             spider.logger.error(f'HTML Storage Pipeline: Failed to connect - {e}')
             raise
 
+    def _setup_session(self, spider):
+        """Apply session-level settings and statements for the write path"""
+        self._session_state = True
+
+        # Raw HTML can always be re-crawled, so a crash losing the last
+        # few batch commits is acceptable in exchange for skipping WAL fsync
+        if not spider.settings.getbool('HTML_STORAGE_SYNCHRONOUS_COMMIT', True):
+            self.cursor.execute('SET synchronous_commit = off')
+
+        if spider.settings.getbool('HTML_STORAGE_COPY', False):
+            self.cursor.execute(CREATE_STAGE_SQL)
+            self.conn.commit()
+            self._use_copy = True
+        elif spider.settings.getbool('HTML_STORAGE_PREPARE', True):
+            self.cursor.execute(PREPARE_UPSERT_SQL)
+            self._prepared = True
+
     def close_spider(self, spider):
-        """Close database connection when spider closes"""
+        """Flush buffered rows and close database connection when spider closes"""
+        d = self._schedule_flush(spider) if self.conn and self._buffer else succeed(None)
+        d.addBoth(lambda _: self._close(spider))
+        return d
+
+    def _close(self, spider):
+        """Close cursor and connection"""
         if self.cursor:
             self.cursor.close()
         if self.conn:
-            self.conn.close()
+            # A connection carrying our session state can't go back for reuse
+            self.pool.putconn(self.conn, close=self._session_state)
+            self.conn = None
         spider.logger.info('HTML Storage Pipeline: Database connection closed')
 
     def process_item(self, item, spider):
-        """Store raw HTML in database"""
+        """Buffer raw HTML for the next batched write"""
         adapter = ItemAdapter(item)
 
         try:
-            # Get or create provider
-            provider_id = self._get_or_create_provider(
+            crawled_at_ns = adapter.get('crawled_at_ns')
+            crawled_at = adapter.get('crawled_at')
+            if crawled_at_ns:
+                crawled_at = datetime.utcfromtimestamp(crawled_at_ns / 1e9)
+            elif crawled_at:
+                crawled_at = datetime.fromisoformat(crawled_at)
+            else:
+                crawled_at = datetime.utcnow()
+
+            # Provider is resolved to an ID at flush time, off the reactor
+            url = adapter.get('url')
+            self._buffer[url] = (
+                url,
                 adapter.get('provider', 'unknown'),
-                spider
+                adapter.get('html_content'),
+                adapter.get('http_status', 200),
+                adapter.get('content_type'),
+                crawled_at,
+                adapter.get('source_url'),
+                adapter.get('page_type', 'unknown'),
             )
 
-            # Check if URL already exists
-            existing = self._get_existing_record(adapter.get('url'), spider)
-
-            if existing:
-                # Update existing record
-                self._update_record(existing['id'], adapter, provider_id, spider)
-            else:
-                # Insert new record
-                self._insert_record(adapter, provider_id, spider)
-
         except Exception as e:
             spider.logger.error(f'HTML Storage Pipeline: Error - {e}')
             # Don't fail the pipeline, just log
+            return item
+
+        if len(self._buffer) >= self.BATCH_SIZE:
+            d = self._schedule_flush(spider)
+            d.addCallback(lambda _: item)
+            return d
 
         return item
 
+    def _schedule_flush(self, spider):
+        """Hand the current buffer to a worker thread; returns a Deferred"""
+        rows = list(self._buffer.values())
+        self._buffer = {}
+        return self._write_lock.run(threads.deferToThread, self._flush, rows, spider)
+
+    def _flush(self, rows, spider):
+        """Write a batch of rows in one upsert and commit (runs in a worker thread)"""
+        try:
+            self._write_rows([self._resolve_row(row, spider) for row in rows])
+            self.conn.commit()
+            spider.logger.info(f'Stored HTML batch: {len(rows)} pages')
+        except Exception as e:
+            self.conn.rollback()
+            spider.logger.warning(
+                f'HTML Storage Pipeline: Batch of {len(rows)} failed ({e}), retrying row by row'
+            )
+            self._flush_rows_singly(rows, spider)
+
+    def _flush_rows_singly(self, rows, spider):
+        """Write rows one transaction each, so a bad row only loses itself"""
+        stored = 0
+        for row in rows:
+            try:
+                self._write_rows([self._resolve_row(row, spider)])
+                self.conn.commit()
+                stored += 1
+            except Exception as e:
+                self.conn.rollback()
+                spider.logger.error(f'HTML Storage Pipeline: Failed to store {row[0]} - {e}')
+        spider.logger.info(f'Stored HTML batch: {stored} of {len(rows)} pages')
+
+    def _resolve_row(self, row, spider):
+        """Swap a buffered row's provider name for its ID and clean its HTML"""
+        return (row[0], self._get_or_create_provider(row[1], spider), self._clean_html(row[2])) + row[3:]
+
+    def _write_rows(self, rows):
+        """Upsert resolved rows through the configured write path (no commit)"""
+        if self._use_copy:
+            self._copy_rows(rows)
+        elif self._prepared:
+            execute_batch(self.cursor, EXECUTE_UPSERT_SQL, rows, page_size=self.BATCH_SIZE)
+        else:
+            execute_values(
+                self.cursor,
+                UPSERT_RAW_SQL,
+                rows,
+                template=UPSERT_RAW_TEMPLATE,
+                page_size=self.BATCH_SIZE
+            )
+
+    def _clean_html(self, html):
+        """Strip scripts, styles and comments from HTML unless disabled"""
+        if self._strip_html and html:
+            return STRIP_HTML_RE.sub('', html)
+        return html
+
+    def _copy_rows(self, rows):
+        """COPY rows into the staging table and upsert them into RawCrawlData"""
+        buf = io.StringIO()
+        csv.writer(buf).writerows(
+            tuple(COPY_NULL if value is None else value for value in row) for row in rows
+        )
+        buf.seek(0)
+
+        self.cursor.copy_expert(COPY_STAGE_SQL, buf)
+        self.cursor.execute(UPSERT_FROM_STAGE_SQL)
+        # raw_stage is emptied by ON COMMIT DELETE ROWS
+
     def _get_or_create_provider(self, provider_name, spider):
         """Get provider ID, creating if necessary"""
         # Check cache first
         if provider_name in self.provider_cache:
+            self.provider_cache.move_to_end(provider_name)
             return self.provider_cache[provider_name]
 
-        # Check database
-        self.cursor.execute(
-            'SELECT id FROM "CeuProvider" WHERE name = %s',
-            (provider_name,)
-        )
-        result = self.cursor.fetchone()
-
-        if result:
-            self.provider_cache[provider_name] = result['id']
-            return result['id']
-
-        # Create new provider
+        # Committed straight away so a later batch rollback can't undo it
         self.cursor.execute(
-            """
-            INSERT INTO "CeuProvider" (id, name, "baseUrl", active)
-            VALUES (gen_random_uuid(), %s, %s, true)
-            RETURNING id
-            """,
+            UPSERT_PROVIDER_SQL,
             (provider_name, f'https://www.{provider_name}.com')
         )
-        provider_id = self.cursor.fetchone()['id']
+        provider_id, inserted = self.cursor.fetchone()
         self.conn.commit()
-        self.provider_cache[provider_name] = provider_id
-        spider.logger.info(f'Created new provider: {provider_name}')
 
-        return provider_id
-
-    def _get_existing_record(self, url, spider):
-        """Check if URL already exists in RawCrawlData"""
-        if not url:
-            return None
-
-        self.cursor.execute(
-            'SELECT id, status FROM "RawCrawlData" WHERE url = %s',
-            (url,)
-        )
-        return self.cursor.fetchone()
+        self._cache_provider(provider_name, provider_id)
+        if inserted:
+            spider.logger.info(f'Created new provider: {provider_name}')
 
-    def _insert_record(self, adapter, provider_id, spider):
-        """Insert new raw crawl record"""
-        self.cursor.execute(
-            """
-            INSERT INTO "RawCrawlData" (
-                id, url, "providerId", "htmlContent", "httpStatus",
-                "contentType", "crawledAt", status, "sourceUrl", "pageType"
-            )
-            VALUES (
-                gen_random_uuid(), %s, %s, %s, %s,
-                %s, %s, 'pending', %s, %s
-            )
-            RETURNING id
-            """,
-            (
-                adapter.get('url'),
-                provider_id,
-                adapter.get('html_content'),
-                adapter.get('http_status', 200),
-                adapter.get('content_type'),
-                datetime.fromisoformat(adapter.get('crawled_at')) if adapter.get('crawled_at') else datetime.utcnow(),
-                adapter.get('source_url'),
-                adapter.get('page_type', 'unknown')
-            )
-        )
-        record_id = self.cursor.fetchone()['id']
-        self.conn.commit()
-        spider.logger.info(f'Stored HTML: {adapter.get("url")[:80]}...')
+        return provider_id
 
-    def _update_record(self, record_id, adapter, provider_id, spider):
-        """Update existing raw crawl record"""
-        self.cursor.execute(
-            """
-            UPDATE "RawCrawlData"
-            SET "htmlContent" = %s,
-                "httpStatus" = %s,
-                "contentType" = %s,
-                "crawledAt" = %s,
-                status = 'pending',
-                "sourceUrl" = %s,
-                "pageType" = %s,
-                "processedAt" = NULL,
-                "extractedData" = NULL,
-                "extractionMeta" = NULL
-            WHERE id = %s
-            """,
-            (
-                adapter.get('html_content'),
-                adapter.get('http_status', 200),
-                adapter.get('content_type'),
-                datetime.fromisoformat(adapter.get('crawled_at')) if adapter.get('crawled_at') else datetime.utcnow(),
-                adapter.get('source_url'),
-                adapter.get('page_type', 'unknown'),
-                record_id
-            )
-        )
-        self.conn.commit()
-        spider.logger.info(f'Updated HTML: {adapter.get("url")[:80]}...')
+    def _cache_provider(self, provider_name, provider_id):
+        """Add a provider ID to the cache, evicting the least recently used"""
+        self.provider_cache[provider_name] = provider_id
+        if len(self.provider_cache) > self.PROVIDER_CACHE_SIZE:
+            self.provider_cache.popitem(last=False)
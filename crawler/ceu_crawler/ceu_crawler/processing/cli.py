@@ -14,6 +14,9 @@ import logging
 import sys
 from typing import Optional
 
+from psycopg2.extras import RealDictCursor
+
+from ..core.db import get_pool
 from .processor import CourseProcessor
 
 logger = logging.getLogger(__name__)
@@ -73,9 +76,6 @@ def show_stats(db_config: dict = None):
     """
     Show statistics about raw crawl data.
     """
-    import psycopg2
-    from psycopg2.extras import RealDictCursor
-
     config = db_config or {
         'host': 'localhost',
         'port': 5432,
@@ -84,91 +84,93 @@ def show_stats(db_config: dict = None):
         'password': 'postgres'
     }
 
-    conn = psycopg2.connect(**config)
+    pool = get_pool(config)
+    conn = pool.getconn()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
 
     try:
-        # Get counts by status
-        cursor.execute("""
-            SELECT status, COUNT(*) as count
-            FROM "RawCrawlData"
-            GROUP BY status
-            ORDER BY status
-        """)
-        status_counts = cursor.fetchall()
-
-        # Get counts by provider
-        cursor.execute("""
-            SELECT p.name, COUNT(r.id) as count
-            FROM "RawCrawlData" r
-            LEFT JOIN "CeuProvider" p ON r."providerId" = p.id
-            GROUP BY p.name
-            ORDER BY count DESC
-        """)
-        provider_counts = cursor.fetchall()
-
-        # Get counts by page type
+        # All four breakdowns in one round-trip, bundled as JSON
         cursor.execute("""
-            SELECT "pageType", COUNT(*) as count
-            FROM "RawCrawlData"
-            GROUP BY "pageType"
-            ORDER BY count DESC
-        """)
-        page_type_counts = cursor.fetchall()
-
-        # Get recent failures
-        cursor.execute("""
-            SELECT url, "processingError", "processedAt"
-            FROM "RawCrawlData"
-            WHERE status = 'failed'
-            ORDER BY "processedAt" DESC
-            LIMIT 5
+            WITH s AS (
+                SELECT status, COUNT(*) as count
+                FROM "RawCrawlData"
+                GROUP BY status
+            ),
+            p AS (
+                SELECT p.name, COUNT(r.id) as count
+                FROM "RawCrawlData" r
+                LEFT JOIN "CeuProvider" p ON r."providerId" = p.id
+                GROUP BY p.name
+            ),
+            pt AS (
+                SELECT "pageType", COUNT(*) as count
+                FROM "RawCrawlData"
+                GROUP BY "pageType"
+            ),
+            f AS (
+                SELECT url, "processingError", "processedAt"
+                FROM "RawCrawlData"
+                WHERE status = 'failed'
+                ORDER BY "processedAt" DESC
+                LIMIT 5
+            )
+            SELECT json_build_object(
+                'status', (SELECT COALESCE(json_agg(s ORDER BY s.status), '[]') FROM s),
+                'provider', (SELECT COALESCE(json_agg(p ORDER BY p.count DESC), '[]') FROM p),
+                'page_type', (SELECT COALESCE(json_agg(pt ORDER BY pt.count DESC), '[]') FROM pt),
+                'failures', (SELECT COALESCE(json_agg(f ORDER BY f."processedAt" DESC), '[]') FROM f)
+            ) as stats
         """)
-        recent_failures = cursor.fetchall()
-
-        print("\n" + "=" * 60)
-        print("Raw Crawl Data Statistics")
-        print("=" * 60)
-
-        print("\nBy Status:")
-        print("-" * 30)
+        stats = cursor.fetchone()['stats']
+        status_counts = stats['status']
+        provider_counts = stats['provider']
+        page_type_counts = stats['page_type']
+        recent_failures = stats['failures']
+
+        # Build the whole report and write it once
+        lines = [
+            "\n" + "=" * 60 + "\n",
+            "Raw Crawl Data Statistics\n",
+            "=" * 60 + "\n",
+        ]
+
+        lines.append("\nBy Status:\n")
+        lines.append("-" * 30 + "\n")
         for row in status_counts:
-            print(f"  {row['status']:15} {row['count']:>6}")
+            lines.append(f"  {row['status']:15} {row['count']:>6}\n")
 
-        print("\nBy Provider:")
-        print("-" * 30)
+        lines.append("\nBy Provider:\n")
+        lines.append("-" * 30 + "\n")
         for row in provider_counts:
             name = row['name'] or 'Unknown'
-            print(f"  {name:15} {row['count']:>6}")
+            lines.append(f"  {name:15} {row['count']:>6}\n")
 
-        print("\nBy Page Type:")
-        print("-" * 30)
+        lines.append("\nBy Page Type:\n")
+        lines.append("-" * 30 + "\n")
         for row in page_type_counts:
             page_type = row['pageType'] or 'unknown'
-            print(f"  {page_type:15} {row['count']:>6}")
+            lines.append(f"  {page_type:15} {row['count']:>6}\n")
 
         if recent_failures:
-            print("\nRecent Failures:")
-            print("-" * 60)
+            lines.append("\nRecent Failures:\n")
+            lines.append("-" * 60 + "\n")
             for row in recent_failures:
-                print(f"  URL: {row['url'][:50]}...")
-                print(f"  Error: {row['processingError']}")
-                print()
+                lines.append(f"  URL: {row['url'][:50]}...\n")
+                lines.append(f"  Error: {row['processingError']}\n")
+                lines.append("\n")
 
-        print("=" * 60)
+        lines.append("=" * 60 + "\n")
+        sys.stdout.write("".join(lines))
 
     finally:
         cursor.close()
-        conn.close()
+        pool.putconn(conn)
 
 
 def show_failed(limit: int = 10, db_config: dict = None):
     """
     Show failed processing records.
     """
-    import psycopg2
-    from psycopg2.extras import RealDictCursor
-
     config = db_config or {
         'host': 'localhost',
         'port': 5432,
@@ -177,8 +179,12 @@ def show_failed(limit: int = 10, db_config: dict = None):
         'password': 'postgres'
     }
 
-    conn = psycopg2.connect(**config)
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    pool = get_pool(config)
+    conn = pool.getconn()
+    # Named (server-side) cursor: rows stream in itersize chunks instead of
+    # being materialised client-side
+    cursor = conn.cursor(name='failed_iter', cursor_factory=RealDictCursor)
+    cursor.itersize = 1000
 
     try:
         cursor.execute("""
@@ -188,36 +194,42 @@ def show_failed(limit: int = 10, db_config: dict = None):
             ORDER BY "processedAt" DESC
             LIMIT %s
         """, (limit,))
-        records = cursor.fetchall()
-
-        if not records:
-            print("\nNo failed records found.")
-            return
 
-        print("\n" + "=" * 80)
-        print(f"Failed Records ({len(records)} shown)")
-        print("=" * 80)
+        lines = []
+        shown = 0
+        for record in cursor:
+            lines.append(f"\nID: {record['id']}\n")
+            lines.append(f"URL: {record['url']}\n")
+            lines.append(f"Page Type: {record['pageType']}\n")
+            lines.append(f"Processed At: {record['processedAt']}\n")
+            lines.append(f"Error: {record['processingError']}\n")
+            lines.append("-" * 80 + "\n")
+
+            shown += 1
+            if shown >= limit:
+                break
+
+        if not shown:
+            lines.append("\nNo failed records found.\n")
+        else:
+            # Header goes in once the rows are counted
+            lines[:0] = [
+                "\n" + "=" * 80 + "\n",
+                f"Failed Records ({shown} shown)\n",
+                "=" * 80 + "\n",
+            ]
 
-        for record in records:
-            print(f"\nID: {record['id']}")
-            print(f"URL: {record['url']}")
-            print(f"Page Type: {record['pageType']}")
-            print(f"Processed At: {record['processedAt']}")
-            print(f"Error: {record['processingError']}")
-            print("-" * 80)
+        sys.stdout.write("".join(lines))
 
     finally:
         cursor.close()
-        conn.close()
+        pool.putconn(conn)
 
 
 def reprocess_record(record_id: str, db_config: dict = None):
     """
     Reprocess a specific record by ID.
     """
-    import psycopg2
-    from psycopg2.extras import RealDictCursor
-
     config = db_config or {
         'host': 'localhost',
         'port': 5432,
@@ -226,53 +238,49 @@ def reprocess_record(record_id: str, db_config: dict = None):
         'password': 'postgres'
     }
 
-    conn = psycopg2.connect(**config)
+    pool = get_pool(config)
+    conn = pool.getconn()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
 
     try:
-        # Reset record to pending
+        # Reset record to pending and fetch it back with its provider name
         cursor.execute("""
-            UPDATE "RawCrawlData"
-            SET status = 'pending',
-                "processedAt" = NULL,
-                "processingError" = NULL,
-                "extractedData" = NULL,
-                "extractionMeta" = NULL,
-                "courseId" = NULL
-            WHERE id = %s
-            RETURNING id, url
+            WITH u AS (
+                UPDATE "RawCrawlData"
+                SET status = 'pending',
+                    "processedAt" = NULL,
+                    "processingError" = NULL,
+                    "extractedData" = NULL,
+                    "extractionMeta" = NULL,
+                    "courseId" = NULL
+                WHERE id = %s
+                RETURNING *
+            )
+            SELECT u.*, p.name as provider_name
+            FROM u
+            LEFT JOIN "CeuProvider" p ON u."providerId" = p.id
         """, (record_id,))
 
-        result = cursor.fetchone()
+        record = cursor.fetchone()
         conn.commit()
 
-        if result:
-            print(f"Reset record: {result['url']}")
+        if record:
+            print(f"Reset record: {record['url']}")
 
             # Now process it
             processor = CourseProcessor(db_config=config)
-
-            cursor.execute("""
-                SELECT r.*, p.name as provider_name
-                FROM "RawCrawlData" r
-                LEFT JOIN "CeuProvider" p ON r."providerId" = p.id
-                WHERE r.id = %s
-            """, (record_id,))
-            record = cursor.fetchone()
-
-            if record:
-                result = processor.process_record(record)
-                print(f"Processing result: success={result.success}, page_type={result.page_type}")
-                if result.error:
-                    print(f"Error: {result.error}")
-                if result.course_data:
-                    print(f"Course: {result.course_data.get('title', 'N/A')}")
+            result = processor.process_record(record)
+            print(f"Processing result: success={result.success}, page_type={result.page_type}")
+            if result.error:
+                print(f"Error: {result.error}")
+            if result.course_data:
+                print(f"Course: {result.course_data.get('title', 'N/A')}")
         else:
             print(f"Record not found: {record_id}")
 
     finally:
         cursor.close()
-        conn.close()
+        pool.putconn(conn)
 
 
 def test_extraction(html_file: str = None, url: str = None):
@@ -3,12 +3,65 @@ Text Extraction and Normalization
 
 Extracts clean text from HTML and performs normalization.
 """
+import json
 import re
 import unicodedata
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
-from bs4 import BeautifulSoup
+import soupsieve
+from bs4 import BeautifulSoup, Tag
 from dataclasses import dataclass
 
+from .result_cache import ResultCache, source_version, text_key
+
+# lxml's C parser is several times faster than the pure-Python html.parser;
+# it comes with Scrapy, but fall back if it's missing
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# orjson parses JSON-LD blocks 2-3x faster than the stdlib; its decode errors
+# subclass json.JSONDecodeError. It only takes exact str/bytes (not str
+# subclasses such as bs4's NavigableString), so script bodies are stored as str.
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+# Regex patterns are compiled once at import time
+_TITLE_SUFFIX_RE = re.compile(r'\s*[\|–-]\s*[^|–-]+$')  # " | PESI"-style suffixes
+_TOKEN_RE = re.compile(r'\b\w+\b')
+_SENT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Control characters except tab, newline and carriage return, deleted via
+# str.translate (a C-level table lookup per character)
+_CTRL_TABLE = dict.fromkeys(
+    list(range(0x00, 0x09)) + [0x0b, 0x0c] + list(range(0x0e, 0x20)) + list(range(0x7f, 0xa0))
+)
+
+# Strings at least this long bypass the normalization cache
+_NORMALIZE_CACHE_MAX_LEN = 512
+
+
+def _normalize(text: str) -> str:
+    """Normalize text (see TextExtractor._normalize_text)"""
+    # Unicode normalization (NFKC - compatibility decomposition, then composition)
+    text = unicodedata.normalize('NFKC', text)
+
+    # Remove control characters except newlines and tabs
+    text = text.translate(_CTRL_TABLE)
+
+    # Collapse whitespace runs (including newlines) into single spaces and
+    # strip the ends; str.split() does both in C, without a regex pass
+    return ' '.join(text.split())
+
+
+_normalize_cached = lru_cache(maxsize=8192)(_normalize)
+
 
 @dataclass
 class ExtractedText:
@@ -33,15 +86,27 @@ class TextExtractor:
     """
 
     # Tags to remove completely (including content)
-    REMOVE_TAGS = ['script', 'style', 'nav', 'footer', 'header', 'aside',
-                   'noscript', 'iframe', 'svg', 'form']
+    REMOVE_TAGS = frozenset({'script', 'style', 'nav', 'footer', 'header', 'aside',
+                             'noscript', 'iframe', 'svg', 'form'})
+
+    HEADING_TAGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+
+    # Common description selectors, in priority order; parsed once here
+    # rather than by every soup.select() call
+    DESCRIPTION_SELECTORS = [soupsieve.compile(selector) for selector in (
+        '.productDescription', '.product-description', '.description',
+        '.course-description', '.overview', '.summary', '.about',
+        '[itemprop="description"]', '.content p'
+    )]
 
     # Tags that typically contain important content
     CONTENT_TAGS = ['article', 'main', 'section', '.content', '.description',
                     '.course-content', '.product-description']
 
     def __init__(self):
-        pass
+        # Results keyed by a hash of the HTML, namespaced by this module's
+        # code so extraction changes don't serve old results; see result_cache
+        self.cache = ResultCache(f'text:{source_version(__file__)}')
 
     def extract(self, html: str) -> ExtractedText:
         """
@@ -53,93 +118,140 @@ class TextExtractor:
         Returns:
             ExtractedText object with extracted content
         """
-        soup = BeautifulSoup(html, 'html.parser')
+        key = text_key(html) if self.cache.enabled else None
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return cached
+
+        soup = BeautifulSoup(html, HTML_PARSER)
+
+        # One walk over the tree collects everything the helpers need
+        parts = self._collect(soup)
 
         # Remove unwanted tags
-        for tag in self.REMOVE_TAGS:
-            for element in soup.find_all(tag):
-                element.decompose()
+        for element in parts['remove']:
+            element.decompose()
 
         result = ExtractedText()
 
         # Extract title
-        result.title = self._extract_title(soup)
+        result.title = self._extract_title(parts)
 
         # Extract meta description
-        result.meta_description = self._extract_meta_description(soup)
+        result.meta_description = self._extract_meta_description(parts)
 
         # Extract headings
-        result.headings = self._extract_headings(soup)
+        result.headings = self._extract_headings(parts)
 
         # Extract main description/content
-        result.description = self._extract_description(soup)
+        result.description = self._extract_description(soup, parts)
 
         # Extract full normalized text
         result.full_text = self._normalize_text(soup.get_text(separator=' '))
 
         # Extract structured data (JSON-LD, microdata)
-        result.structured_data = self._extract_structured_data(soup)
+        result.structured_data = self._extract_structured_data(parts)
 
+        if key:
+            self.cache.set(key, result)
         return result
 
-    def _extract_title(self, soup: BeautifulSoup) -> Optional[str]:
+    def _collect(self, soup: BeautifulSoup) -> Dict:
+        """
+        Walk the tree once, in document order, bucketing the elements the
+        extract helpers read. Subtrees of REMOVE_TAGS are not descended into;
+        they are returned under 'remove' for the caller to decompose.
+        JSON-LD scripts are read here, before the scripts are removed.
+        """
+        parts = {
+            'remove': [],
+            'title': None,
+            'meta': {},  # first meta tag per name/property
+            'headings': {level: [] for level in range(1, 7)},
+            'paragraphs': [],
+            'ld_json': [],
+        }
+
+        stack = list(reversed(soup.contents))
+        while stack:
+            el = stack.pop()
+            if not isinstance(el, Tag):
+                continue
+
+            name = el.name
+            if name in self.REMOVE_TAGS:
+                if name == 'script' and el.get('type') == 'application/ld+json' and el.string is not None:
+                    parts['ld_json'].append(str(el.string))
+                parts['remove'].append(el)
+                continue
+
+            if name in self.HEADING_TAGS:
+                parts['headings'][self.HEADING_TAGS[name]].append(el)
+            elif name == 'p':
+                parts['paragraphs'].append(el)
+            elif name == 'title':
+                if parts['title'] is None:
+                    parts['title'] = el
+            elif name == 'meta':
+                key = el.get('name') or el.get('property')
+                if key and key not in parts['meta']:
+                    parts['meta'][key] = el
+
+            stack.extend(reversed(el.contents))
+
+        return parts
+
+    def _extract_title(self, parts: Dict) -> Optional[str]:
         """Extract page title"""
         # Try h1 first
-        h1 = soup.find('h1')
-        if h1:
-            return self._normalize_text(h1.get_text())
+        if parts['headings'][1]:
+            return self._normalize_text(parts['headings'][1][0].get_text())
 
         # Try title tag
-        title_tag = soup.find('title')
+        title_tag = parts['title']
         if title_tag:
             title = title_tag.get_text()
             # Remove common suffixes like " | PESI"
-            title = re.sub(r'\s*[\|–-]\s*[^|–-]+$', '', title)
+            title = _TITLE_SUFFIX_RE.sub('', title)
             return self._normalize_text(title)
 
         # Try og:title
-        og_title = soup.find('meta', {'property': 'og:title'})
+        og_title = parts['meta'].get('og:title')
         if og_title:
             return self._normalize_text(og_title.get('content', ''))
 
         return None
 
-    def _extract_meta_description(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_meta_description(self, parts: Dict) -> Optional[str]:
         """Extract meta description"""
-        meta = soup.find('meta', {'name': 'description'})
+        meta = parts['meta'].get('description')
         if meta:
             return self._normalize_text(meta.get('content', ''))
 
-        og_desc = soup.find('meta', {'property': 'og:description'})
+        og_desc = parts['meta'].get('og:description')
         if og_desc:
             return self._normalize_text(og_desc.get('content', ''))
 
         return None
 
-    def _extract_headings(self, soup: BeautifulSoup) -> List[str]:
+    def _extract_headings(self, parts: Dict) -> List[str]:
         """Extract all headings (h1-h6)"""
         headings = []
         for i in range(1, 7):
-            for heading in soup.find_all(f'h{i}'):
+            for heading in parts['headings'][i]:
                 text = self._normalize_text(heading.get_text())
                 if text and len(text) > 2:
                     headings.append(text)
         return headings
 
-    def _extract_description(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_description(self, soup: BeautifulSoup, parts: Dict) -> Optional[str]:
         """Extract main description content"""
         # Try common description selectors
-        selectors = [
-            '.productDescription', '.product-description', '.description',
-            '.course-description', '.overview', '.summary', '.about',
-            '[itemprop="description"]', '.content p'
-        ]
-
-        for selector in selectors:
-            elements = soup.select(selector)
+        for selector in self.DESCRIPTION_SELECTORS:
+            elements = selector.select(soup, limit=3)  # Limit to first 3 matches
             if elements:
                 text_parts = []
-                for el in elements[:3]:  # Limit to first 3 matches
+                for el in elements:
                     text = self._normalize_text(el.get_text())
                     if text and len(text) > 20:
                         text_parts.append(text)
@@ -147,23 +259,21 @@ class TextExtractor:
                     return ' '.join(text_parts)[:2000]  # Limit length
 
         # Fallback: get first substantial paragraph
-        for p in soup.find_all('p'):
+        for p in parts['paragraphs']:
             text = self._normalize_text(p.get_text())
             if text and len(text) > 100:
                 return text[:2000]
 
         return None
 
-    def _extract_structured_data(self, soup: BeautifulSoup) -> Dict:
+    def _extract_structured_data(self, parts: Dict) -> Dict:
         """Extract JSON-LD structured data"""
-        import json
-
         data = {}
 
-        # Find JSON-LD scripts
-        for script in soup.find_all('script', {'type': 'application/ld+json'}):
+        # JSON-LD script bodies collected by _collect
+        for script in parts['ld_json']:
             try:
-                json_data = json.loads(script.string)
+                json_data = _json_loads(script)
                 if isinstance(json_data, dict):
                     data_type = json_data.get('@type', 'unknown')
                     data[data_type] = json_data
@@ -172,7 +282,7 @@ class TextExtractor:
                         if isinstance(item, dict):
                             data_type = item.get('@type', 'unknown')
                             data[data_type] = item
-            except (json.JSONDecodeError, TypeError):
+            except json.JSONDecodeError:
                 continue
 
         return data
@@ -188,19 +298,10 @@ class TextExtractor:
         if not text:
             return ""
 
-        # Unicode normalization (NFKC - compatibility decomposition, then composition)
-        text = unicodedata.normalize('NFKC', text)
-
-        # Remove control characters except newlines and tabs
-        text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
-
-        # Collapse multiple whitespace (including newlines) into single space
-        text = re.sub(r'\s+', ' ', text)
-
-        # Strip leading/trailing whitespace
-        text = text.strip()
-
-        return text
+        # Short strings (headings, titles, site chrome) repeat across pages
+        if len(text) < _NORMALIZE_CACHE_MAX_LEN:
+            return _normalize_cached(text)
+        return _normalize(text)
 
     def tokenize(self, text: str) -> List[str]:
         """
@@ -209,7 +310,7 @@ class TextExtractor:
         For more advanced tokenization, use spaCy in NLPProcessor.
         """
         # Simple word tokenization - split on non-word characters
-        tokens = re.findall(r'\b\w+\b', text.lower())
+        tokens = _TOKEN_RE.findall(text.lower())
         return tokens
 
     def extract_sentences(self, text: str) -> List[str]:
@@ -219,5 +320,5 @@ class TextExtractor:
         For better sentence segmentation, use spaCy in NLPProcessor.
         """
         # Simple sentence splitting on common terminators
-        sentences = re.split(r'(?<=[.!?])\s+', text)
+        sentences = _SENT_RE.split(text)
         return [s.strip() for s in sentences if s.strip()]
@@ -9,19 +9,102 @@ Provides validation for:
 """
 
 import re
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 from dataclasses import dataclass, field
-from urllib.parse import urlparse
+from urllib.parse import urlsplit
 
 try:
-    import requests
     from parsel import Selector
-    HAS_HTTP = True
+    HAS_PARSEL = True
+except ImportError:
+    HAS_PARSEL = False
+
+try:
+    import requests
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
+
+# httpx is preferred when installed: one pooled client for every live check,
+# over HTTP/2 when h2 is also installed
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+try:
+    import h2  # noqa: F401 - enables httpx's HTTP/2 support
+    HAS_H2 = True
+except ImportError:
+    HAS_H2 = False
+
+HAS_HTTP = HAS_PARSEL and (HAS_HTTPX or HAS_REQUESTS)
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    HAS_LXML = True
 except ImportError:
-    HAS_HTTP = False
+    HAS_LXML = False
+
+from ceu_crawler.core.config_loader import ConfigLoader, ProviderConfig, compile_pattern
+
+
+# Live checks run in a thread pool and lxml parsers must not be shared
+# between threads, so each thread keeps its own parser per encoding
+_parsers = threading.local()
+
+
+def _html_parser(encoding: Optional[str]):
+    """lxml HTML parser for an encoding (None to detect it), built once per thread."""
+    cache = getattr(_parsers, 'by_encoding', None)
+    if cache is None:
+        cache = _parsers.by_encoding = {}
+    parser = cache.get(encoding)
+    if parser is None:
+        parser = cache[encoding] = lxml_html.HTMLParser(
+            encoding=encoding, remove_comments=True, remove_pis=True
+        )
+    return parser
 
-from ceu_crawler.core.config_loader import ConfigLoader, ProviderConfig
+
+# Bytes handed to the parser at a time while a test page downloads
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _parse_stream(chunks, encoding: Optional[str]) -> Optional['Selector']:
+    """
+    Build a Selector by feeding a page body to lxml as it downloads.
+
+    The tree grows chunk by chunk, so the body is never held whole as bytes
+    or decoded text alongside it. encoding is the charset the response
+    headers declared; with None, lxml detects it from the page's meta tags.
+    Returns None when the body holds no parseable document.
+    """
+    parser = _html_parser(encoding)
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+    except BaseException:
+        # Reset the parser for its next use before passing the error on
+        try:
+            parser.close()
+        except etree.LxmlError:
+            pass
+        raise
+
+    try:
+        root = parser.close()
+    except etree.LxmlError:
+        return None
+    if root is None:
+        return None
+    return Selector(root=root, type='html')
 
 
 @dataclass
@@ -65,6 +148,12 @@ class ConfigValidator:
         'selectors.course_links.css',
     ]
 
+    # Concurrent live checks across providers, and per host
+    LIVE_WORKERS = 8
+    LIVE_REQUESTS_PER_HOST = 2
+
+    USER_AGENT = 'Mozilla/5.0 (compatible; CEUValidator/1.0)'
+
     def __init__(self, config_dir: Path = None):
         """
         Initialize the validator.
@@ -74,13 +163,35 @@ class ConfigValidator:
         """
         self.loader = ConfigLoader(config_dir)
         self.session = None
-
-        if HAS_HTTP:
+        self._host_slots = defaultdict(
+            lambda: threading.BoundedSemaphore(self.LIVE_REQUESTS_PER_HOST)
+        )
+        self._host_slots_lock = threading.Lock()
+
+        if HAS_HTTP and HAS_HTTPX:
+            self.session = httpx.Client(
+                http2=HAS_H2,
+                headers={'User-Agent': self.USER_AGENT},
+                timeout=30,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            )
+        elif HAS_HTTP:
             self.session = requests.Session()
             self.session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (compatible; CEUValidator/1.0)'
+                'User-Agent': self.USER_AGENT
             })
 
+    def close(self):
+        """Close the HTTP session and its pooled connections."""
+        session = getattr(self, 'session', None)
+        if session is not None:
+            session.close()
+            self.session = None
+
+    def __del__(self):
+        self.close()
+
     def validate_file(self, file_path: str, live: bool = False) -> ValidationResult:
         """
         Validate a configuration file.
@@ -153,13 +264,28 @@ class ConfigValidator:
         """
         Validate all provider configurations.
 
+        Live checks are network bound, so with live=True providers are
+        validated in a thread pool, at most LIVE_REQUESTS_PER_HOST at a time
+        against any one host.
+
         Returns:
             Dict mapping provider names to ValidationResults
         """
-        results = {}
-        for provider_name in self.loader.list_providers():
-            results[provider_name] = self.validate_provider(provider_name, live=live)
-        return results
+        provider_names = self.loader.list_providers()
+        if not live:
+            return {name: self.validate_provider(name) for name in provider_names}
+
+        with ThreadPoolExecutor(max_workers=self.LIVE_WORKERS) as executor:
+            futures = {
+                name: executor.submit(self.validate_provider, name, live=True)
+                for name in provider_names
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Semaphore limiting concurrent live requests to the URL's host."""
+        with self._host_slots_lock:
+            return self._host_slots[urlsplit(url).netloc]
 
     def _validate_structure(self, config: ProviderConfig, result: ValidationResult):
         """Validate required fields are present."""
@@ -198,31 +324,27 @@ class ConfigValidator:
 
     def _validate_urls(self, config: ProviderConfig, result: ValidationResult):
         """Validate URL formats."""
+        # Each URL is split once and reused by the checks below
+        start_parts = [(url, urlsplit(url)) for url in config.crawl.start_urls]
+
         # Validate start_urls
-        for url in config.crawl.start_urls:
+        for url, parsed in start_parts:
             if not url.startswith(('http://', 'https://')):
                 result.errors.append(f"Invalid start URL (must be http/https): {url}")
-            else:
-                parsed = urlparse(url)
-                if not parsed.netloc:
-                    result.errors.append(f"Invalid URL format: {url}")
+            elif not parsed.netloc:
+                result.errors.append(f"Invalid URL format: {url}")
 
-        # Validate domain base_urls
-        for domain in config.domains:
-            base_url = domain.get('base_url', '')
-            if base_url and not base_url.startswith(('http://', 'https://')):
-                result.errors.append(f"Invalid domain base_url: {base_url}")
-
-        # Check start_urls match domains
+        # Validate domain base_urls, collecting their hosts
         domain_hosts = set()
         for domain in config.domains:
             base_url = domain.get('base_url', '')
             if base_url:
-                parsed = urlparse(base_url)
-                domain_hosts.add(parsed.netloc)
+                if not base_url.startswith(('http://', 'https://')):
+                    result.errors.append(f"Invalid domain base_url: {base_url}")
+                domain_hosts.add(urlsplit(base_url).netloc)
 
-        for url in config.crawl.start_urls:
-            parsed = urlparse(url)
+        # Check start_urls match domains
+        for url, parsed in start_parts:
             if parsed.netloc not in domain_hosts:
                 result.warnings.append(
                     f"Start URL host '{parsed.netloc}' not in domains list"
@@ -241,7 +363,7 @@ class ConfigValidator:
 
             for pattern in pattern_list:
                 try:
-                    re.compile(pattern)
+                    compile_pattern(pattern)
                 except re.error as e:
                     result.errors.append(
                         f"Invalid regex in {pattern_type} pattern '{pattern}': {e}"
@@ -284,6 +406,37 @@ class ConfigValidator:
                     f"XPath usually starts with /, . or ( - got: {xpath[:20]}..."
                 )
 
+    def _fetch_page(self, url: str) -> 'Selector':
+        """
+        Fetch a test page and return a Selector over it.
+
+        With lxml available the body is streamed into the parser as it
+        arrives (see _parse_stream); otherwise it is read whole and parsed
+        by parsel.
+        """
+        if HAS_HTTPX and isinstance(self.session, httpx.Client):
+            with self.session.stream('GET', url, timeout=30) as response:
+                response.raise_for_status()
+                if HAS_LXML:
+                    selector = _parse_stream(
+                        response.iter_bytes(STREAM_CHUNK_SIZE), response.charset_encoding
+                    )
+                    return selector or Selector(text='')
+                response.read()
+                return Selector(text=response.text)
+
+        with self.session.get(url, timeout=30, stream=HAS_LXML) as response:
+            response.raise_for_status()
+            if HAS_LXML:
+                # requests falls back to ISO-8859-1 for text/* without a charset
+                declared = 'charset' in response.headers.get('content-type', '').lower()
+                selector = _parse_stream(
+                    response.iter_content(STREAM_CHUNK_SIZE),
+                    response.encoding if declared else None
+                )
+                return selector or Selector(text='')
+            return Selector(text=response.text)
+
     def _test_live(self, config: ProviderConfig, result: ValidationResult):
         """Test selectors against live site."""
         if not HAS_HTTP:
@@ -300,15 +453,13 @@ class ConfigValidator:
         result.suggestions.append(f"Testing against: {test_url}")
 
         try:
-            response = self.session.get(test_url, timeout=30)
-            response.raise_for_status()
-            html = response.text
+            with self._host_slot(test_url):
+                selector = self._fetch_page(test_url)
         except Exception as e:
             result.warnings.append(f"Failed to fetch test URL: {e}")
             return
 
         # Test selectors
-        selector = Selector(text=html)
         selectors_config = config.selectors.course_links
 
         test_results = {}
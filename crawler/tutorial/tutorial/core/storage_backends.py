@@ -22,9 +22,12 @@ Usage:
 import os
 import json
 import hashlib
+import heapq
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set, Tuple
 from pathlib import Path
 
 try:
@@ -36,11 +39,57 @@ except ImportError:
 
 try:
     import boto3
+    from botocore.config import Config
     from botocore.exceptions import ClientError
     HAS_BOTO3 = True
 except ImportError:
     HAS_BOTO3 = False
 
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+
+# boto3 clients are slow to build and each owns a connection pool, so all
+# S3Backend instances in the process share one session and one client per region
+_S3_CLIENT_CONFIG = Config(
+    max_pool_connections=64,
+    retries={'mode': 'adaptive', 'max_attempts': 10},
+    tcp_keepalive=True,
+    s3={'addressing_style': 'virtual'},
+) if HAS_BOTO3 else None
+_s3_session = None
+_s3_clients: Dict[str, Any] = {}
+_s3_lock = threading.Lock()
+
+
+def _get_s3_client(region: str):
+    """Return the shared S3 client for a region, creating it on first use."""
+    global _s3_session
+    with _s3_lock:
+        if region not in _s3_clients:
+            if _s3_session is None:
+                _s3_session = boto3.session.Session()
+            _s3_clients[region] = _s3_session.client(
+                's3', region_name=region, config=_S3_CLIENT_CONFIG
+            )
+        return _s3_clients[region]
+
+
+# HTML compresses 5-10x; level 3 keeps compression well ahead of upload speed
+_ZSTD_COMPRESSOR = zstandard.ZstdCompressor(level=3) if HAS_ZSTD else None
+_ZSTD_DECOMPRESSOR = zstandard.ZstdDecompressor() if HAS_ZSTD else None
+
+
+def _crawled_at_iso(item: Dict[str, Any]) -> str:
+    """ISO crawl time for an item; spiders send epoch nanoseconds in crawled_at_ns."""
+    crawled_at_ns = item.get('crawled_at_ns')
+    if crawled_at_ns:
+        return datetime.utcfromtimestamp(crawled_at_ns / 1e9).isoformat()
+    return item.get('crawled_at') or datetime.utcnow().isoformat()
+
 
 class StorageBackend(ABC):
     """
@@ -92,8 +141,26 @@ class StorageBackend(ABC):
         pass
 
     @abstractmethod
-    def list_pending(self, provider: str = None, limit: int = 100) -> List[Dict[str, Any]]:
-        """List items pending processing."""
+    def list_pending(
+        self,
+        provider: str = None,
+        limit: int = 100,
+        after_crawled_at: Any = None
+    ) -> Tuple[List[Dict[str, Any]], Any]:
+        """
+        List items pending processing, newest first.
+
+        Args:
+            provider: Optional provider name filter
+            limit: Maximum items to return
+            after_crawled_at: next_cursor from a previous call; only items
+                              after it in (crawl time, id) order are returned
+
+        Returns:
+            Tuple of (items, next_cursor). next_cursor is the (crawl time, id)
+            of the last item, or None when there are no more items. The id
+            breaks ties between items crawled at the same moment.
+        """
         pass
 
     def __enter__(self):
@@ -133,9 +200,13 @@ class PostgresBackend(StorageBackend):
         self._provider_cache: Dict[str, str] = {}
 
     def open(self):
-        """Open database connection."""
+        """Open database connection and warm the provider cache."""
         self.connection = psycopg2.connect(**self.config)
 
+        with self.connection.cursor() as cursor:
+            cursor.execute('SELECT id, name FROM "CeuProvider"')
+            self._provider_cache = {name: provider_id for provider_id, name in cursor.fetchall()}
+
     def close(self):
         """Close database connection."""
         if self.connection:
@@ -150,51 +221,30 @@ class PostgresBackend(StorageBackend):
         provider_id = self._get_or_create_provider(item.get('provider', 'unknown'))
 
         with self.connection.cursor() as cursor:
-            # Check if URL exists
-            cursor.execute(
-                'SELECT id FROM "RawCrawlData" WHERE url = %s',
-                (item['url'],)
-            )
-            existing = cursor.fetchone()
-
-            if existing:
-                # Update existing record
-                cursor.execute('''
-                    UPDATE "RawCrawlData"
-                    SET "htmlContent" = %s,
-                        "httpStatus" = %s,
-                        "contentType" = %s,
-                        "crawledAt" = %s,
-                        "status" = 'pending',
-                        "sourceUrl" = %s,
-                        "pageType" = %s
-                    WHERE id = %s
-                ''', (
-                    item.get('html_content', ''),
-                    item.get('http_status', 200),
-                    item.get('content_type', 'text/html'),
-                    datetime.utcnow(),
-                    item.get('source_url'),
-                    item.get('page_type', 'unknown'),
-                    existing[0]
-                ))
-            else:
-                # Insert new record
-                cursor.execute('''
-                    INSERT INTO "RawCrawlData"
-                    (id, url, "providerId", "htmlContent", "httpStatus",
-                     "contentType", "crawledAt", "status", "sourceUrl", "pageType")
-                    VALUES (gen_random_uuid(), %s, %s, %s, %s, %s, %s, 'pending', %s, %s)
-                ''', (
-                    item['url'],
-                    provider_id,
-                    item.get('html_content', ''),
-                    item.get('http_status', 200),
-                    item.get('content_type', 'text/html'),
-                    datetime.utcnow(),
-                    item.get('source_url'),
-                    item.get('page_type', 'unknown')
-                ))
+            # Insert, or refresh the existing row for this URL, in one statement
+            cursor.execute('''
+                INSERT INTO "RawCrawlData"
+                (id, url, "providerId", "htmlContent", "httpStatus",
+                 "contentType", "crawledAt", "status", "sourceUrl", "pageType")
+                VALUES (gen_random_uuid(), %s, %s, %s, %s, %s, %s, 'pending', %s, %s)
+                ON CONFLICT (url) DO UPDATE
+                SET "htmlContent" = EXCLUDED."htmlContent",
+                    "httpStatus" = EXCLUDED."httpStatus",
+                    "contentType" = EXCLUDED."contentType",
+                    "crawledAt" = EXCLUDED."crawledAt",
+                    "status" = 'pending',
+                    "sourceUrl" = EXCLUDED."sourceUrl",
+                    "pageType" = EXCLUDED."pageType"
+            ''', (
+                item['url'],
+                provider_id,
+                item.get('html_content', ''),
+                item.get('http_status', 200),
+                item.get('content_type', 'text/html'),
+                datetime.utcnow(),
+                item.get('source_url'),
+                item.get('page_type', 'unknown')
+            ))
 
             self.connection.commit()
             return True
@@ -224,31 +274,63 @@ class PostgresBackend(StorageBackend):
             )
             return cursor.fetchone() is not None
 
-    def list_pending(self, provider: str = None, limit: int = 100) -> List[Dict[str, Any]]:
-        """List items pending processing."""
+    def list_pending(
+        self,
+        provider: str = None,
+        limit: int = 100,
+        after_crawled_at: Any = None
+    ) -> Tuple[List[Dict[str, Any]], Any]:
+        """
+        List items pending processing using keyset pagination.
+
+        Pass the returned cursor back as after_crawled_at to fetch the next
+        page; this walks the (status, "crawledAt") index instead of using OFFSET.
+        The cursor is ("crawledAt", id): crawl times have millisecond precision
+        and batched writes share them, so id keeps ties from being skipped.
+        """
         if not self.connection:
             raise RuntimeError("Backend not opened")
 
+        query = '''
+            SELECT * FROM "RawCrawlData"
+            WHERE status = 'pending'
+        '''
+        params: List[Any] = []
+
+        if provider:
+            provider_id = self._get_provider_id(provider)
+            if not provider_id:
+                return [], None
+            query += ' AND "providerId" = %s'
+            params.append(provider_id)
+
+        if after_crawled_at is not None:
+            query += ' AND ("crawledAt", id) < (%s, %s)'
+            params.extend(after_crawled_at)
+
+        query += ' ORDER BY "crawledAt" DESC, id DESC LIMIT %s'
+        params.append(limit)
+
         with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
-            if provider:
-                provider_id = self._get_provider_id(provider)
-                if not provider_id:
-                    return []
-                cursor.execute('''
-                    SELECT * FROM "RawCrawlData"
-                    WHERE status = 'pending' AND "providerId" = %s
-                    ORDER BY "crawledAt" DESC
-                    LIMIT %s
-                ''', (provider_id, limit))
-            else:
-                cursor.execute('''
-                    SELECT * FROM "RawCrawlData"
-                    WHERE status = 'pending'
-                    ORDER BY "crawledAt" DESC
-                    LIMIT %s
-                ''', (limit,))
-
-            return [dict(row) for row in cursor.fetchall()]
+            cursor.execute(query, params)
+            items = [dict(row) for row in cursor.fetchall()]
+
+        next_cursor = (items[-1]['crawledAt'], items[-1]['id']) if items else None
+        return items, next_cursor
+
+    def mark_failed(self, url: str, error: str):
+        """Mark a stored row failed so processing skips it."""
+        if not self.connection:
+            raise RuntimeError("Backend not opened")
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                '''UPDATE "RawCrawlData"
+                   SET status = 'failed', "processingError" = %s
+                   WHERE url = %s''',
+                (error, url)
+            )
+            self.connection.commit()
 
     def _get_or_create_provider(self, name: str) -> str:
         """Get or create provider, return ID."""
@@ -256,22 +338,16 @@ class PostgresBackend(StorageBackend):
             return self._provider_cache[name]
 
         with self.connection.cursor() as cursor:
-            cursor.execute(
-                'SELECT id FROM "CeuProvider" WHERE name = %s',
-                (name,)
-            )
-            row = cursor.fetchone()
-
-            if row:
-                provider_id = row[0]
-            else:
-                cursor.execute('''
-                    INSERT INTO "CeuProvider" (id, name, "baseUrl", active, "createdAt", "updatedAt")
-                    VALUES (gen_random_uuid(), %s, %s, true, NOW(), NOW())
-                    RETURNING id
-                ''', (name, f'https://www.{name}.com'))
-                provider_id = cursor.fetchone()[0]
-                self.connection.commit()
+            # Single round-trip get-or-create; the no-op DO UPDATE makes
+            # RETURNING emit the existing row's id on conflict
+            cursor.execute('''
+                INSERT INTO "CeuProvider" (id, name, "baseUrl", active)
+                VALUES (gen_random_uuid(), %s, %s, true)
+                ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+                RETURNING id
+            ''', (name, f'https://www.{name}.com'))
+            provider_id = cursor.fetchone()[0]
+            self.connection.commit()
 
             self._provider_cache[name] = provider_id
             return provider_id
@@ -300,7 +376,8 @@ class S3Backend(StorageBackend):
         Initialize S3 backend.
 
         Args:
-            config: S3 configuration with bucket, prefix, region
+            config: S3 configuration with bucket, prefix, region, and optional
+                    preload_keys to index existing keys on open()
         """
         if not HAS_BOTO3:
             raise ImportError("boto3 required for S3Backend")
@@ -309,15 +386,43 @@ class S3Backend(StorageBackend):
             'bucket': os.environ.get('S3_BUCKET', 'ceu-crawler'),
             'prefix': os.environ.get('S3_PREFIX', 'raw_html/'),
             'region': os.environ.get('AWS_REGION', 'us-east-1'),
+            'preload_keys': os.environ.get('S3_PRELOAD_KEYS', 'false').lower() == 'true',
         }
         self.s3_client = None
 
+        # Keys known to exist, so exists() can skip a head_object round-trip
+        self._known_keys: Set[str] = set()
+
     def open(self):
         """Initialize S3 client."""
-        self.s3_client = boto3.client('s3', region_name=self.config['region'])
+        self.s3_client = _get_s3_client(self.config['region'])
+        if self.config.get('preload_keys'):
+            self.load_key_index()
+
+    def load_key_index(self) -> int:
+        """
+        Populate the known-key index from a bucket listing.
+
+        One list_objects_v2 call covers up to 1000 keys, far cheaper than
+        a head_object per URL during deduplication.
+
+        Returns:
+            Number of keys indexed
+        """
+        if not self.s3_client:
+            raise RuntimeError("Backend not opened")
+
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(
+            Bucket=self.config['bucket'],
+            Prefix=self.config['prefix']
+        ):
+            self._known_keys.update(obj['Key'] for obj in page.get('Contents', []))
+
+        return len(self._known_keys)
 
     def close(self):
-        """Close S3 client (no-op for boto3)."""
+        """Release S3 client (the shared client stays alive for reuse)."""
         self.s3_client = None
 
     def _url_to_key(self, url: str) -> str:
@@ -341,19 +446,36 @@ class S3Backend(StorageBackend):
             'provider': item.get('provider', 'unknown'),
             'page_type': item.get('page_type', 'unknown'),
             'source_url': item.get('source_url'),
-            'crawled_at': item.get('crawled_at', datetime.utcnow().isoformat()),
+            'crawled_at': _crawled_at_iso(item),
             'content_hash': item.get('content_hash', ''),
             'status': 'pending',
         }
 
+        body = json.dumps(data).encode('utf-8')
+        extra_args = {}
+        if HAS_ZSTD:
+            body = _ZSTD_COMPRESSOR.compress(body)
+            extra_args['ContentEncoding'] = 'zstd'
+
         self.s3_client.put_object(
             Bucket=self.config['bucket'],
             Key=key,
-            Body=json.dumps(data),
+            Body=body,
             ContentType='application/json',
+            **extra_args,
         )
+        self._known_keys.add(key)
         return True
 
+    def _read_object(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """Decode a get_object response body, decompressing zstd objects."""
+        body = response['Body'].read()
+        if response.get('ContentEncoding') == 'zstd':
+            if not HAS_ZSTD:
+                raise ImportError("zstandard required to read compressed S3 objects")
+            body = _ZSTD_DECOMPRESSOR.decompress(body)
+        return json.loads(body.decode('utf-8'))
+
     def retrieve(self, url: str) -> Optional[Dict[str, Any]]:
         """Retrieve item from S3."""
         if not self.s3_client:
@@ -366,7 +488,7 @@ class S3Backend(StorageBackend):
                 Bucket=self.config['bucket'],
                 Key=key
             )
-            return json.loads(response['Body'].read().decode('utf-8'))
+            return self._read_object(response)
         except ClientError as e:
             if e.response['Error']['Code'] == 'NoSuchKey':
                 return None
@@ -378,48 +500,73 @@ class S3Backend(StorageBackend):
             raise RuntimeError("Backend not opened")
 
         key = self._url_to_key(url)
+        if key in self._known_keys:
+            return True
 
         try:
             self.s3_client.head_object(
                 Bucket=self.config['bucket'],
                 Key=key
             )
-            return True
         except ClientError:
             return False
 
-    def list_pending(self, provider: str = None, limit: int = 100) -> List[Dict[str, Any]]:
-        """List pending items from S3."""
-        if not self.s3_client:
-            raise RuntimeError("Backend not opened")
+        self._known_keys.add(key)
+        return True
 
-        items = []
-        paginator = self.s3_client.get_paginator('list_objects_v2')
+    def list_pending(
+        self,
+        provider: str = None,
+        limit: int = 100,
+        after_crawled_at: Any = None
+    ) -> Tuple[List[Dict[str, Any]], Any]:
+        """
+        List pending items from S3.
 
-        for page in paginator.paginate(
-            Bucket=self.config['bucket'],
-            Prefix=self.config['prefix'],
-            MaxKeys=limit
-        ):
-            for obj in page.get('Contents', []):
-                try:
-                    response = self.s3_client.get_object(
-                        Bucket=self.config['bucket'],
-                        Key=obj['Key']
-                    )
-                    data = json.loads(response['Body'].read().decode('utf-8'))
+        S3 listings are ordered by key rather than crawl time, so every object
+        is read and the newest pending ones are kept, ordered and paged by
+        (crawled_at, url) like the Postgres cursor (ISO strings compare in
+        order; url breaks ties).
+        """
+        if not self.s3_client:
+            raise RuntimeError("Backend not opened")
 
-                    if data.get('status') == 'pending':
-                        if provider and data.get('provider') != provider:
-                            continue
-                        items.append(data)
+        after = None
+        if after_crawled_at is not None:
+            crawled_at, url = after_crawled_at
+            if hasattr(crawled_at, 'isoformat'):
+                crawled_at = crawled_at.isoformat()
+            after = (crawled_at, url)
 
-                        if len(items) >= limit:
-                            return items
-                except Exception:
-                    continue
+        def page_key(data):
+            return data.get('crawled_at', ''), data.get('url', '')
 
-        return items
+        def pending():
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(
+                Bucket=self.config['bucket'],
+                Prefix=self.config['prefix']
+            ):
+                for obj in page.get('Contents', []):
+                    try:
+                        response = self.s3_client.get_object(
+                            Bucket=self.config['bucket'],
+                            Key=obj['Key']
+                        )
+                        data = self._read_object(response)
+                    except Exception:
+                        continue
+
+                    if data.get('status') != 'pending':
+                        continue
+                    if provider and data.get('provider') != provider:
+                        continue
+                    if after is not None and page_key(data) >= after:
+                        continue
+                    yield data
+
+        items = heapq.nlargest(limit, pending(), key=page_key)
+        return items, (page_key(items[-1]) if items else None)
 
 
 class HybridBackend(StorageBackend):
@@ -440,28 +587,57 @@ class HybridBackend(StorageBackend):
         """
         self.postgres = PostgresBackend(postgres_config)
         self.s3 = S3Backend(s3_config)
+        self._executor: Optional[ThreadPoolExecutor] = None
 
     def open(self):
         """Open both backends."""
         self.postgres.open()
         self.s3.open()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='hybrid-s3')
 
     def close(self):
         """Close both backends."""
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
         self.postgres.close()
         self.s3.close()
 
     def store(self, item: Dict[str, Any]) -> bool:
-        """Store HTML in S3, metadata in Postgres."""
-        # Store full item in S3
-        self.s3.store(item)
+        """
+        Store HTML in S3, metadata in Postgres.
+
+        The two writes overlap. The Postgres row commits as 'pending' before
+        the S3 result is known, so if the upload fails the row is marked
+        'failed' (the processor only picks up pending rows) and the S3 error
+        is raised.
+        """
+        if not self._executor:
+            raise RuntimeError("Backend not opened")
+
+        # Store full item in S3 on a worker thread while Postgres is written
+        s3_future = self._executor.submit(self.s3.store, item)
 
         # Store metadata (without HTML) in Postgres
-        metadata_item = item.copy()
+        metadata_item = {k: v for k, v in item.items() if k != 'html_content'}
         metadata_item['html_content'] = ''  # Don't duplicate HTML
         metadata_item['s3_key'] = self.s3._url_to_key(item['url'])
 
-        return self.postgres.store(metadata_item)
+        try:
+            stored = self.postgres.store(metadata_item)
+        except Exception:
+            # Don't leave the upload running unobserved; the Postgres error wins
+            s3_future.exception()
+            raise
+
+        try:
+            s3_stored = s3_future.result()
+        except Exception as e:
+            self.postgres.mark_failed(item['url'], f'S3 upload failed: {e}')
+            raise
+        if not s3_stored:
+            self.postgres.mark_failed(item['url'], 'S3 upload failed')
+        return s3_stored and stored
 
     def retrieve(self, url: str) -> Optional[Dict[str, Any]]:
         """Retrieve from S3 (has full content)."""
@@ -471,9 +647,14 @@ class HybridBackend(StorageBackend):
         """Check Postgres (faster than S3)."""
         return self.postgres.exists(url)
 
-    def list_pending(self, provider: str = None, limit: int = 100) -> List[Dict[str, Any]]:
+    def list_pending(
+        self,
+        provider: str = None,
+        limit: int = 100,
+        after_crawled_at: Any = None
+    ) -> Tuple[List[Dict[str, Any]], Any]:
         """List from Postgres, enrich with S3 content if needed."""
-        return self.postgres.list_pending(provider, limit)
+        return self.postgres.list_pending(provider, limit, after_crawled_at)
 
 
 def get_storage_backend(env_config: Dict[str, Any] = None) -> StorageBackend:
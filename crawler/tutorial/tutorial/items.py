@@ -3,6 +3,9 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/items.html
 
+from dataclasses import dataclass
+from typing import Optional
+
 import scrapy
 
 
@@ -10,3 +13,35 @@ class TutorialItem(scrapy.Item):
     # define the fields for your item here like:
     # name = scrapy.Field()
     pass
+
+
+@dataclass(slots=True)
+class CourseItem:
+    """A course scraped from a provider's detail page (see PesiSpider)"""
+    title: Optional[str] = None
+    url: Optional[str] = None
+    instructors: Optional[str] = None
+    image_url: Optional[str] = None
+    description: Optional[str] = None
+    # Numeric values for database
+    price: Optional[float] = None
+    original_price: Optional[float] = None
+    credits: Optional[float] = None
+    duration: Optional[int] = None
+    # Original strings for display
+    price_string: Optional[str] = None
+    original_price_string: Optional[str] = None
+    credits_string: Optional[str] = None
+    duration_string: Optional[str] = None
+    # Course type and dates
+    course_type: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    registration_deadline: Optional[str] = None
+    # Other fields
+    date: Optional[str] = None
+    category: Optional[str] = None
+    field: Optional[str] = None
+    source_url: Optional[str] = None
+    scraped_at: Optional[str] = None
+    provider: Optional[str] = None
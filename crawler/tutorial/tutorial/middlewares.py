@@ -3,7 +3,12 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
 from scrapy import signals
+from scrapy.downloadermiddlewares.retry import get_retry_request
+from scrapy.utils.httpobj import urlparse_cached
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
@@ -98,3 +103,68 @@ class TutorialDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class ThrottleOn429Middleware:
+    """
+    Back off a download slot when the server rate-limits it.
+
+    AutoThrottle only reacts to latency, and 429/503 rejections come back
+    fast, so on its own it keeps hammering a server that is asking it to
+    slow down. This doubles the slot's delay (or applies Retry-After, if
+    larger) and retries the request, up to RETRY_TIMES.
+
+    Register it above RetryMiddleware (550) so it sees these responses first.
+    """
+
+    THROTTLE_STATUSES = (429, 503)
+    DEFAULT_BACKOFF = 5.0
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.max_delay = crawler.settings.getfloat('THROTTLE_MAX_DELAY', 120.0)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def process_response(self, request, response, spider):
+        if response.status not in self.THROTTLE_STATUSES:
+            return response
+
+        slot = self._get_slot(request)
+        if slot is not None:
+            retry_after = self._retry_after(response)
+            slot.delay = min(
+                max(slot.delay * 2, retry_after or self.DEFAULT_BACKOFF),
+                self.max_delay
+            )
+            spider.logger.info(
+                f'{response.status} from {urlparse_cached(request).hostname}, '
+                f'download delay now {slot.delay:.1f}s'
+            )
+
+        retry = get_retry_request(request, spider=spider, reason=f'throttled_{response.status}')
+        return retry or response
+
+    def _get_slot(self, request):
+        """Downloader slot this request was sent through, if any"""
+        downloader = self.crawler.engine.downloader
+        key = request.meta.get('download_slot') or urlparse_cached(request).hostname or ''
+        return downloader.slots.get(key)
+
+    def _retry_after(self, response):
+        """Retry-After in seconds (given as seconds or an HTTP date), or None"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        value = value.decode('latin-1').strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
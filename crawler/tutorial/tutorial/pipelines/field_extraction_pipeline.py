@@ -0,0 +1,18 @@
+from twisted.internet import threads
+
+
+class FieldExtractionPipeline:
+    """
+    Pipeline that runs a spider's field extraction off the reactor thread
+
+    Spiders with an extract_fields(item) method yield raw selector output and
+    leave the regex/keyword work to this stage. It runs in the reactor thread
+    pool, so the callback returns quickly and the engine keeps scheduling
+    downloads. Items from other spiders pass through unchanged.
+    """
+
+    def process_item(self, item, spider):
+        extract_fields = getattr(spider, 'extract_fields', None)
+        if extract_fields is None:
+            return item
+        return threads.deferToThread(extract_fields, item)
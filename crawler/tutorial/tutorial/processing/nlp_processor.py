@@ -7,22 +7,220 @@ Uses spaCy for:
 - Part-of-speech tagging for context-aware extraction
 """
 import re
-from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass, field as dataclass_field
 from datetime import datetime
 import logging
 
+from .result_cache import ResultCache, source_version, text_key
+
 logger = logging.getLogger(__name__)
 
 # Try to import spaCy - it's optional but recommended
 try:
     import spacy
     from spacy.language import Language
+    from spacy.tokens import Doc
     SPACY_AVAILABLE = True
 except ImportError:
     SPACY_AVAILABLE = False
     logger.warning("spaCy not available. Install with: pip install spacy && python -m spacy download en_core_web_sm")
 
+# RE2 (pip install google-re2) is a linear-time DFA engine; the fused
+# fallback/duration scanners use it when present. Their patterns stick to
+# syntax both engines accept (no lookarounds or backreferences).
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+# Without RE2, the third-party regex module (a drop-in for re with better
+# literal-prefix scanning) is the next choice
+try:
+    import regex
+    REGEX_AVAILABLE = True
+except ImportError:
+    REGEX_AVAILABLE = False
+
+if RE2_AVAILABLE:
+    _scan_re = re2
+elif REGEX_AVAILABLE:
+    _scan_re = regex
+else:
+    _scan_re = re
+
+# Components entity extraction doesn't need; skipping them leaves just
+# tokenization + NER
+NER_DISABLE = ['tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'senter']
+
+# Name of the entity ruler that tags durations
+DURATION_RULER = 'duration_ruler'
+
+# Regex patterns are compiled once at import time
+
+# Fallback date and money patterns (used when spaCy isn't available), as
+# (group name, label, pattern). They are fused into one alternation so the
+# text is scanned once; list order is the order results are reported in.
+_FALLBACK_PATTERNS = [
+    # January 15, 2025
+    ('date_long', 'DATE', r'(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}'),
+    # Jan 15, 2025
+    ('date_short', 'DATE', r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\.?\s+\d{1,2},?\s+\d{4}'),
+    # 01/15/2025 or 1/15/2025
+    ('date_us', 'DATE', r'\d{1,2}/\d{1,2}/\d{4}'),
+    # 2025-01-15
+    ('date_iso', 'DATE', r'\d{4}-\d{2}-\d{2}'),
+    # $199.99 or $1,299
+    ('money_symbol', 'MONEY', r'\$[\d,]+\.?\d*'),
+    # USD 199.99
+    ('money_code', 'MONEY', r'USD\s*[\d,]+\.?\d*'),
+]
+_FALLBACK_RE = _scan_re.compile(
+    '(?i)' + '|'.join(f'(?P<{name}>{pattern})' for name, _, pattern in _FALLBACK_PATTERNS)
+)
+_FALLBACK_ORDER = {name: i for i, (name, _, _) in enumerate(_FALLBACK_PATTERNS)}
+_FALLBACK_LABELS = {name: label for name, label, _ in _FALLBACK_PATTERNS}
+
+# Duration patterns for the regex path (no spaCy); the group name is the
+# duration type. hours_minutes comes first so "6 hours 30 minutes" is one
+# match rather than two.
+_DURATION_PATTERNS = [
+    # 6 hour 30 minute format
+    ('hours_minutes', r'(?P<hm_hours>\d+)\s*(?:hours?|hrs?)\s*(?:and\s*)?(?P<hm_minutes>\d+)\s*(?:minutes?|mins?)'),
+    # 6 hours, 6.5 hours, 6 hrs
+    ('hours', r'(?P<h_value>\d+\.?\d*)\s*(?:hours?|hrs?)\b'),
+    # 90 minutes, 90 mins
+    ('minutes', r'(?P<m_value>\d+)\s*(?:minutes?|mins?)\b'),
+    # 1 day, 2 days
+    ('days', r'(?P<d_value>\d+)\s*(?:days?)\b'),
+]
+_DURATION_RE = _scan_re.compile(
+    '(?i)' + '|'.join(f'(?P<{name}>{pattern})' for name, pattern in _DURATION_PATTERNS)
+)
+
+
+def _match_minutes(match) -> Optional[int]:
+    """Convert a _DURATION_RE match to minutes"""
+    duration_type = match.lastgroup
+    if duration_type == 'hours':
+        return int(float(match.group('h_value')) * 60)
+    elif duration_type == 'minutes':
+        return int(match.group('m_value'))
+    elif duration_type == 'hours_minutes':
+        return int(match.group('hm_hours')) * 60 + int(match.group('hm_minutes'))
+    elif duration_type == 'days':
+        return int(match.group('d_value')) * 8 * 60  # Assume 8-hour day
+    return None
+
+
+# The same durations as token patterns for spaCy's entity ruler, so they
+# come out of the nlp() pass as DURATION entities; "id" is the duration type
+_HOUR_WORDS = ['hour', 'hours', 'hr', 'hrs']
+_MINUTE_WORDS = ['minute', 'minutes', 'min', 'mins']
+_DAY_WORDS = ['day', 'days']
+_INT_TOKEN = {'TEXT': {'REGEX': r'^\d+$'}}
+_NUMBER_TOKEN = {'TEXT': {'REGEX': r'^\d+(\.\d*)?$'}}
+# Attached forms the tokenizer leaves as one token: "6hrs", "6.5hrs", "90min"
+_ATTACHED_INT_HOURS_TOKEN = {'LOWER': {'REGEX': r'^\d+(hours?|hrs?)$'}}
+_ATTACHED_HOURS_TOKEN = {'LOWER': {'REGEX': r'^\d+(\.\d+)?(hours?|hrs?)$'}}
+_ATTACHED_MINUTES_TOKEN = {'LOWER': {'REGEX': r'^\d+(minutes?|mins?)$'}}
+_ATTACHED_DAYS_TOKEN = {'LOWER': {'REGEX': r'^\d+days?$'}}
+
+DURATION_RULER_PATTERNS = [
+    {'label': 'DURATION', 'id': 'hours_minutes', 'pattern': [
+        _INT_TOKEN, {'LOWER': {'IN': _HOUR_WORDS}}, {'LOWER': 'and', 'OP': '?'},
+        _INT_TOKEN, {'LOWER': {'IN': _MINUTE_WORDS}},
+    ]},
+    {'label': 'DURATION', 'id': 'hours_minutes', 'pattern': [
+        _ATTACHED_INT_HOURS_TOKEN, {'LOWER': 'and', 'OP': '?'}, _ATTACHED_MINUTES_TOKEN,
+    ]},
+    {'label': 'DURATION', 'id': 'hours', 'pattern': [_NUMBER_TOKEN, {'LOWER': {'IN': _HOUR_WORDS}}]},
+    {'label': 'DURATION', 'id': 'hours', 'pattern': [_ATTACHED_HOURS_TOKEN]},
+    {'label': 'DURATION', 'id': 'minutes', 'pattern': [_INT_TOKEN, {'LOWER': {'IN': _MINUTE_WORDS}}]},
+    {'label': 'DURATION', 'id': 'minutes', 'pattern': [_ATTACHED_MINUTES_TOKEN]},
+    {'label': 'DURATION', 'id': 'days', 'pattern': [_INT_TOKEN, {'LOWER': {'IN': _DAY_WORDS}}]},
+    {'label': 'DURATION', 'id': 'days', 'pattern': [_ATTACHED_DAYS_TOKEN]},
+]
+
+_SENT_RE = re.compile(r'(?<=[.!?])\s+')
+_TOKEN_RE = re.compile(r'\b\w+\b')
+
+
+class _MoneyCharFilter(dict):
+    """
+    str.translate table that keeps digits and '.' and deletes everything
+    else (currency symbols, letters, thousands separators). Entries are
+    filled in on first sight of each character, so after warm-up the
+    translate runs entirely in C.
+    """
+
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        value = codepoint if char.isdecimal() or char == '.' else None
+        self[codepoint] = value
+        return value
+
+
+_MONEY_TABLE = _MoneyCharFilter()
+
+
+# Month-name formats, tried in order for dates that aren't purely numeric
+_MONTH_DATE_FORMATS = [
+    '%B %d, %Y',      # January 15, 2025
+    '%B %d %Y',       # January 15 2025
+    '%b %d, %Y',      # Jan 15, 2025
+    '%b. %d, %Y',     # Jan. 15, 2025
+]
+
+_ISO_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+_US_DATE_RE = re.compile(r'\d{1,2}/\d{1,2}/\d{4}')
+
+
+# Date and price strings repeat heavily across pages (recurring course
+# dates, standard prices), so parses are memoized
+
+@lru_cache(maxsize=4096)
+def _cached_parse_date(date_str: str) -> Optional[str]:
+    """Parse date string to ISO format"""
+    # Clean the string
+    date_str = date_str.strip()
+
+    # Every format needs a day and year; spaCy DATE entities like "Monday"
+    # or "next week" are rejected without raising a ValueError per format
+    if not any(c.isdigit() for c in date_str):
+        return None
+
+    # Numeric shapes map to exactly one format
+    if _ISO_DATE_RE.fullmatch(date_str):
+        formats = ['%Y-%m-%d']        # 2025-01-15
+    elif _US_DATE_RE.fullmatch(date_str):
+        formats = ['%m/%d/%Y']        # 01/15/2025
+    else:
+        formats = _MONTH_DATE_FORMATS + ['%m/%d/%Y', '%Y-%m-%d']
+
+    for fmt in formats:
+        try:
+            parsed = datetime.strptime(date_str, fmt)
+            return parsed.isoformat()
+        except ValueError:
+            continue
+
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _cached_parse_money(money_str: str) -> Optional[float]:
+    """Parse money string to float"""
+    # Remove currency symbols and thousands separators in one pass
+    cleaned = money_str.translate(_MONEY_TABLE)
+
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
 
 @dataclass
 class ExtractedEntities:
@@ -41,6 +239,8 @@ class NLPProcessor:
     NLP processing using spaCy for Named Entity Recognition.
     """
 
+    BATCH_SIZE = 64
+
     def __init__(self, model_name: str = "en_core_web_sm"):
         """
         Initialize the NLP processor.
@@ -53,11 +253,33 @@ class NLPProcessor:
         """
         self.nlp = None
         self.model_name = model_name
+        self._sent_disable = []
 
         if SPACY_AVAILABLE:
             try:
                 self.nlp = spacy.load(model_name)
                 logger.info(f"Loaded spaCy model: {model_name}")
+
+                # Durations are tagged by a rule-based component in the
+                # same pass as NER, rather than a second regex scan. Placed
+                # before ner, which then keeps the spans it set.
+                ruler = self.nlp.add_pipe(
+                    'entity_ruler',
+                    name=DURATION_RULER,
+                    before='ner' if 'ner' in self.nlp.pipe_names else None
+                )
+                ruler.add_patterns(DURATION_RULER_PATTERNS)
+
+                # The en_core_web_* models ship a statistical sentence
+                # segmenter (senter), disabled by default. With it on,
+                # sentence splitting doesn't have to run the parser.
+                if 'senter' in self.nlp.disabled:
+                    self.nlp.enable_pipe('senter')
+                if 'senter' in self.nlp.pipe_names:
+                    self._sent_disable = ['tagger', 'parser', 'attribute_ruler', 'lemmatizer',
+                                          DURATION_RULER, 'ner']
+                else:
+                    self._sent_disable = [DURATION_RULER, 'ner']
             except OSError:
                 logger.warning(
                     f"spaCy model '{model_name}' not found. "
@@ -66,37 +288,103 @@ class NLPProcessor:
         else:
             logger.warning("spaCy not available, using fallback extraction")
 
-    def extract_entities(self, text: str) -> ExtractedEntities:
+        # Entities keyed by a hash of the text, namespaced by the model (or
+        # the fallback) and this module's code; see result_cache
+        model = f"{model_name}-{self.nlp.meta.get('version', '')}" if self.nlp else 'fallback'
+        self.cache = ResultCache(f'entities:{model}:{source_version(__file__)}')
+
+    def process(self, text: str) -> Optional['Doc']:
+        """
+        Run the full spaCy pipeline over text once.
+
+        The returned Doc can be handed to extract_entities, get_sentences
+        and get_tokens (or their *_from_doc variants), so a page that needs
+        all three is only parsed once. Returns None without spaCy.
+        """
+        if not self.nlp:
+            return None
+        # senter is only turned on for get_sentences; the parser covers it here
+        return self.nlp(text or '', disable=['senter'])
+
+    def extract_entities(self, text: Union[str, 'Doc']) -> ExtractedEntities:
         """
         Extract named entities from text using spaCy.
 
         Args:
-            text: Input text
+            text: Input text, or a Doc from process()
 
         Returns:
             ExtractedEntities with categorized entities
         """
+        if SPACY_AVAILABLE and isinstance(text, Doc):
+            return self.extract_entities_from_doc(text)
+
         result = ExtractedEntities()
 
         if not text:
             return result
 
+        key = text_key(text) if self.cache.enabled else None
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return cached
+
         if self.nlp:
+            # Durations come from the duration ruler
             result = self._extract_with_spacy(text)
         else:
             result = self._extract_with_fallback(text)
+            result.durations = self._extract_durations(text)
 
-        # Add custom duration extraction (spaCy doesn't have a DURATION entity)
-        result.durations = self._extract_durations(text)
-
+        if key:
+            self.cache.set(key, result)
         return result
 
+    def extract_entities_batch(self, texts: List[str]) -> List[ExtractedEntities]:
+        """
+        Extract named entities from many texts at once.
+
+        With spaCy loaded, texts are streamed through nlp.pipe in batches,
+        which is much cheaper than one nlp() call per text.
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            ExtractedEntities for each text, in the same order
+        """
+        if not self.nlp:
+            return [self.extract_entities(text) for text in texts]
+
+        # Only texts without a cached result go through the pipeline
+        if self.cache.enabled:
+            keys = [text_key(text or '') for text in texts]
+            results = [self.cache.get(key) for key in keys]
+        else:
+            keys = None
+            results = [None] * len(texts)
+        misses = [i for i, result in enumerate(results) if result is None]
+
+        docs = self.nlp.pipe(
+            (texts[i] or '' for i in misses),
+            batch_size=self.BATCH_SIZE,
+            disable=NER_DISABLE
+        )
+
+        for i, doc in zip(misses, docs):
+            results[i] = self.extract_entities_from_doc(doc)
+            if keys:
+                self.cache.set(keys[i], results[i])
+
+        return results
+
     def _extract_with_spacy(self, text: str) -> ExtractedEntities:
         """Extract entities using spaCy NER"""
-        result = ExtractedEntities()
+        return self.extract_entities_from_doc(self.nlp(text, disable=NER_DISABLE))
 
-        # Process text with spaCy
-        doc = self.nlp(text)
+    def extract_entities_from_doc(self, doc: 'Doc') -> ExtractedEntities:
+        """Map a processed spaCy doc's entities onto ExtractedEntities"""
+        result = ExtractedEntities()
 
         # Map spaCy entity types to our categories
         for ent in doc.ents:
@@ -129,29 +417,35 @@ class NLPProcessor:
             elif ent.label_ == 'PERSON':
                 result.persons.append(entity_info)
 
-            elif ent.label_ == 'TIME':
+            elif ent.label_ == 'DURATION':
+                entity_info['type'] = ent.ent_id_
+                entity_info['confidence'] = 0.85
+                entity_info['minutes'] = self._duration_minutes(ent)
                 result.durations.append(entity_info)
 
         return result
 
+    def _duration_minutes(self, ent) -> Optional[int]:
+        """Convert a duration ruler span to minutes"""
+        # The regex accepts both "6 hrs" and "6hrs", so it parses every
+        # span the ruler patterns can produce
+        match = _DURATION_RE.match(ent.text)
+        if match is None:
+            return None
+        return _match_minutes(match)
+
     def _extract_with_fallback(self, text: str) -> ExtractedEntities:
         """Fallback extraction without spaCy using regex patterns"""
         result = ExtractedEntities()
 
-        # Date patterns
-        date_patterns = [
-            # January 15, 2025
-            r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}',
-            # Jan 15, 2025
-            r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\.?\s+\d{1,2},?\s+\d{4}',
-            # 01/15/2025 or 1/15/2025
-            r'\d{1,2}/\d{1,2}/\d{4}',
-            # 2025-01-15
-            r'\d{4}-\d{2}-\d{2}',
-        ]
+        # One pass over the text; stable sort restores per-pattern order
+        matches = sorted(
+            _FALLBACK_RE.finditer(text),
+            key=lambda match: _FALLBACK_ORDER[match.lastgroup]
+        )
 
-        for pattern in date_patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
+        for match in matches:
+            if _FALLBACK_LABELS[match.lastgroup] == 'DATE':
                 result.dates.append({
                     'text': match.group(),
                     'label': 'DATE',
@@ -160,15 +454,7 @@ class NLPProcessor:
                     'parsed': self._parse_date(match.group()),
                     'confidence': 0.7
                 })
-
-        # Money patterns
-        money_patterns = [
-            r'\$[\d,]+\.?\d*',  # $199.99 or $1,299
-            r'USD\s*[\d,]+\.?\d*',  # USD 199.99
-        ]
-
-        for pattern in money_patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
+            else:
                 result.money.append({
                     'text': match.group(),
                     'label': 'MONEY',
@@ -184,40 +470,19 @@ class NLPProcessor:
         """Extract time durations from text"""
         durations = []
 
-        # Duration patterns
-        patterns = [
-            # 6 hours, 6.5 hours, 6 hrs
-            (r'(\d+\.?\d*)\s*(hours?|hrs?)\b', 'hours'),
-            # 90 minutes, 90 mins
-            (r'(\d+)\s*(minutes?|mins?)\b', 'minutes'),
-            # 6 hour 30 minute format
-            (r'(\d+)\s*(?:hours?|hrs?)\s*(?:and\s*)?(\d+)\s*(?:minutes?|mins?)', 'hours_minutes'),
-            # 1 day, 2 days
-            (r'(\d+)\s*(days?)\b', 'days'),
-        ]
+        for match in _DURATION_RE.finditer(text):
+            duration_type = match.lastgroup
+            duration_info = {
+                'text': match.group(),
+                'label': 'DURATION',
+                'start': match.start(),
+                'end': match.end(),
+                'type': duration_type,
+                'confidence': 0.85
+            }
 
-        for pattern, duration_type in patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                duration_info = {
-                    'text': match.group(),
-                    'label': 'DURATION',
-                    'start': match.start(),
-                    'end': match.end(),
-                    'type': duration_type,
-                    'confidence': 0.85
-                }
-
-                # Parse to minutes
-                if duration_type == 'hours':
-                    duration_info['minutes'] = int(float(match.group(1)) * 60)
-                elif duration_type == 'minutes':
-                    duration_info['minutes'] = int(match.group(1))
-                elif duration_type == 'hours_minutes':
-                    duration_info['minutes'] = int(match.group(1)) * 60 + int(match.group(2))
-                elif duration_type == 'days':
-                    duration_info['minutes'] = int(match.group(1)) * 8 * 60  # Assume 8-hour day
-
-                durations.append(duration_info)
+            duration_info['minutes'] = _match_minutes(match)
+            durations.append(duration_info)
 
         return durations
 
@@ -225,82 +490,66 @@ class NLPProcessor:
         """Parse date string to ISO format"""
         if not date_str:
             return None
-
-        # Try various formats
-        formats = [
-            '%B %d, %Y',      # January 15, 2025
-            '%B %d %Y',       # January 15 2025
-            '%b %d, %Y',      # Jan 15, 2025
-            '%b. %d, %Y',     # Jan. 15, 2025
-            '%m/%d/%Y',       # 01/15/2025
-            '%Y-%m-%d',       # 2025-01-15
-        ]
-
-        # Clean the string
-        date_str = date_str.strip()
-
-        for fmt in formats:
-            try:
-                parsed = datetime.strptime(date_str, fmt)
-                return parsed.isoformat()
-            except ValueError:
-                continue
-
-        return None
+        return _cached_parse_date(date_str)
 
     def _parse_money(self, money_str: str) -> Optional[float]:
         """Parse money string to float"""
         if not money_str:
             return None
+        return _cached_parse_money(money_str)
 
-        # Remove currency symbols and parse
-        cleaned = re.sub(r'[^\d.,]', '', money_str)
-
-        # Handle comma as thousand separator
-        cleaned = cleaned.replace(',', '')
-
-        try:
-            return float(cleaned)
-        except ValueError:
-            return None
-
-    def get_sentences(self, text: str) -> List[str]:
+    def get_sentences(self, text: Union[str, 'Doc']) -> List[str]:
         """
         Get sentences using spaCy's sentence segmentation.
         Falls back to simple regex if spaCy not available.
         """
+        if SPACY_AVAILABLE and isinstance(text, Doc):
+            return self.get_sentences_from_doc(text)
+
         if not text:
             return []
 
         if self.nlp:
-            doc = self.nlp(text)
-            return [sent.text.strip() for sent in doc.sents]
+            return self.get_sentences_from_doc(self.nlp(text, disable=self._sent_disable))
         else:
             # Fallback to simple sentence splitting
-            sentences = re.split(r'(?<=[.!?])\s+', text)
+            sentences = _SENT_RE.split(text)
             return [s.strip() for s in sentences if s.strip()]
 
-    def get_tokens(self, text: str) -> List[Dict]:
+    def get_sentences_from_doc(self, doc: 'Doc') -> List[str]:
+        """Get sentences from an already processed Doc"""
+        if not doc.has_annotation('SENT_START'):
+            # Pipeline without a parser or senter
+            return [s.strip() for s in _SENT_RE.split(doc.text) if s.strip()]
+        return [sent.text.strip() for sent in doc.sents]
+
+    def get_tokens(self, text: Union[str, 'Doc']) -> List[Dict]:
         """
         Get tokens with POS tags using spaCy.
         Falls back to simple word tokenization if spaCy not available.
         """
+        if SPACY_AVAILABLE and isinstance(text, Doc):
+            return self.get_tokens_from_doc(text)
+
         if not text:
             return []
 
         if self.nlp:
-            doc = self.nlp(text)
-            return [
-                {
-                    'text': token.text,
-                    'lemma': token.lemma_,
-                    'pos': token.pos_,
-                    'tag': token.tag_,
-                    'is_stop': token.is_stop,
-                }
-                for token in doc
-            ]
+            return self.get_tokens_from_doc(self.process(text))
         else:
             # Fallback to simple tokenization
-            tokens = re.findall(r'\b\w+\b', text)
+            tokens = _TOKEN_RE.findall(text)
             return [{'text': t, 'lemma': t.lower()} for t in tokens]
+
+    def get_tokens_from_doc(self, doc: 'Doc') -> List[Dict]:
+        """Get tokens with POS tags from an already processed Doc"""
+        return [
+            {
+                'text': token.text,
+                'lemma': token.lemma_,
+                'pos': token.pos_,
+                'tag': token.tag_,
+                'is_stop': token.is_stop,
+            }
+            for token in doc
+        ]
@@ -12,9 +12,9 @@ import logging
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
-import psycopg2
 from psycopg2.extras import RealDictCursor
 
+from ..core import db
 from .text_extractor import TextExtractor, ExtractedText
 from .nlp_processor import NLPProcessor, ExtractedEntities
 from .ceu_patterns import CEUPatternExtractor, CEUExtractionResult
@@ -71,13 +71,7 @@ class CourseProcessor:
     def connect(self):
         """Open database connection"""
         if not self.conn:
-            self.conn = psycopg2.connect(
-                host=self.db_config['host'],
-                port=self.db_config['port'],
-                database=self.db_config['database'],
-                user=self.db_config['user'],
-                password=self.db_config['password']
-            )
+            self.conn = db.connect(self.db_config)
             self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
             logger.info("Database connection established")
 
@@ -133,8 +127,10 @@ class CourseProcessor:
 
             logger.info(f"Found {len(records)} pending records to process")
 
+            prepared = self._prepare_batch(records)
+
             for record in records:
-                result = self.process_record(record)
+                result = self.process_record(record, prepared.get(record['id']))
                 stats['processed'] += 1
 
                 if result.success:
@@ -154,12 +150,50 @@ class CourseProcessor:
 
         return stats
 
-    def process_record(self, record: Dict) -> ProcessingResult:
+    def _prepare_batch(self, records: List[Dict]) -> Dict[str, Tuple[ExtractedText, ExtractedEntities]]:
+        """
+        Run text extraction and NER for all course pages in one go.
+
+        NER goes through NLPProcessor.extract_entities_batch so spaCy
+        processes the texts together. Records whose text extraction fails
+        are left out and handled (and marked failed) by process_record; if
+        the batch NER fails, nothing is prepared.
+
+        Returns:
+            Dict of record ID -> (text_data, entities)
+        """
+        texts = {}
+        for record in records:
+            if record.get('pageType') != 'course_detail':
+                continue
+            try:
+                texts[record['id']] = self.text_extractor.extract(record['htmlContent'])
+            except Exception as e:
+                logger.debug(f"Deferring {record['url']} to per-record processing: {e}")
+
+        try:
+            entities = self.nlp_processor.extract_entities_batch(
+                [text_data.full_text for text_data in texts.values()]
+            )
+        except Exception as e:
+            # Every record falls back to process_record, so one bad text
+            # only fails its own record
+            logger.warning(f"Batch NER failed, processing records one by one: {e}")
+            return {}
+        return dict(zip(texts, zip(texts.values(), entities)))
+
+    def process_record(
+        self,
+        record: Dict,
+        prepared: Optional[Tuple[ExtractedText, ExtractedEntities]] = None
+    ) -> ProcessingResult:
         """
         Process a single raw crawl record.
 
         Args:
             record: Dict with raw crawl data
+            prepared: Optional (text_data, entities) already computed for
+                      this record by _prepare_batch
 
         Returns:
             ProcessingResult
@@ -185,7 +219,7 @@ class CourseProcessor:
                 )
 
             # Run extraction pipeline
-            result = self._extract_course_data(html, url, record.get('provider_name'))
+            result = self._extract_course_data(html, url, record.get('provider_name'), prepared)
 
             if result.success and result.course_data:
                 # Store or update course
@@ -212,9 +246,17 @@ class CourseProcessor:
                 error=str(e)
             )
 
-    def _extract_course_data(self, html: str, url: str, provider: str) -> ProcessingResult:
+    def _extract_course_data(
+        self,
+        html: str,
+        url: str,
+        provider: str,
+        prepared: Optional[Tuple[ExtractedText, ExtractedEntities]] = None
+    ) -> ProcessingResult:
         """
         Run the full extraction pipeline on HTML content.
+
+        Steps 1 and 2 are skipped when prepared carries their results.
         """
         extraction_meta = {
             'methods': [],
@@ -223,8 +265,11 @@ class CourseProcessor:
             }
         }
 
+        text_data, entities = prepared or (None, None)
+
         # Step 1: Extract text from HTML
-        text_data = self.text_extractor.extract(html)
+        if text_data is None:
+            text_data = self.text_extractor.extract(html)
         extraction_meta['text_extraction'] = {
             'title_found': bool(text_data.title),
             'description_found': bool(text_data.description),
@@ -233,7 +278,8 @@ class CourseProcessor:
         }
 
         # Step 2: NLP entity extraction
-        entities = self.nlp_processor.extract_entities(text_data.full_text)
+        if entities is None:
+            entities = self.nlp_processor.extract_entities(text_data.full_text)
         extraction_meta['nlp_extraction'] = {
             'dates_found': len(entities.dates),
             'money_found': len(entities.money),
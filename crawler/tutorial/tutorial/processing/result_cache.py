@@ -0,0 +1,118 @@
+"""
+Content-hash keyed cache for extraction results.
+
+Pages from one provider share boilerplate, and re-crawls mostly return
+unchanged content, so TextExtractor and NLPProcessor keep their results keyed
+by a hash of their input and skip the parse/NER work on a repeat.
+
+The cache is off unless configured. Setting CEU_CACHE_DIR (with diskcache
+installed) keeps it on disk, so it survives between processing runs;
+CEU_CACHE_SIZE instead turns on an in-process LRU of that many results:
+
+    export CEU_CACHE_DIR=/tmp/ceu_cache
+    export CEU_CACHE_SIZE=512
+
+Namespaces carry a hash of the code that produced the results (see
+source_version), so a re-run after an extraction fix doesn't get results
+from the old code back.
+
+Cached results are shared between callers and must not be mutated.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Any, Optional
+
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
+try:
+    import diskcache
+    HAS_DISKCACHE = True
+except ImportError:
+    HAS_DISKCACHE = False
+
+
+# In-memory results kept when no cache directory is set; 0 disables the cache
+DEFAULT_MAXSIZE = int(os.environ.get('CEU_CACHE_SIZE', 0))
+
+# Size bound for the on-disk cache, least recently used entries go first
+DISK_SIZE_LIMIT = 1024 ** 3
+
+
+def text_key(text: str) -> str:
+    """Hash text for use as a cache key (xxh3 when available, like the spiders' content hash)"""
+    data = text.encode('utf-8', 'surrogatepass')
+    if HAS_XXHASH:
+        return xxhash.xxh3_64_hexdigest(data)
+    return hashlib.md5(data).hexdigest()
+
+
+def source_version(*paths: str) -> str:
+    """Short hash of the given source files, for use in a cache namespace"""
+    digest = hashlib.md5()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+class ResultCache:
+    """
+    LRU cache of extraction results, in memory or on disk.
+
+    Keys are namespaced so one on-disk cache can hold results from both
+    TextExtractor and NLPProcessor.
+    """
+
+    def __init__(self, namespace: str, maxsize: int = DEFAULT_MAXSIZE,
+                 directory: Optional[str] = None):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self._disk = None
+        self._memory: OrderedDict = OrderedDict()
+
+        directory = directory or os.environ.get('CEU_CACHE_DIR')
+        if directory and HAS_DISKCACHE:
+            self._disk = diskcache.Cache(
+                directory,
+                size_limit=DISK_SIZE_LIMIT,
+                eviction_policy='least-recently-used'
+            )
+
+    @property
+    def enabled(self) -> bool:
+        """Whether results are kept at all"""
+        return self._disk is not None or self.maxsize > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached result for key, or None"""
+        if self._disk is not None:
+            return self._disk.get((self.namespace, key))
+
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a result, evicting the least recently used entry when full"""
+        if self._disk is not None:
+            self._disk.set((self.namespace, key), value, tag=self.namespace)
+            return
+        if self.maxsize <= 0:
+            return
+
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every result cached under this namespace"""
+        if self._disk is not None:
+            self._disk.evict(self.namespace)
+        self._memory.clear()
@@ -50,6 +50,7 @@ class HtmlCollectorSpider(BaseHtmlCollectorSpider):
     custom_settings = {
         'DOWNLOAD_DELAY': 8,
         'RANDOMIZE_DOWNLOAD_DELAY': True,
+        # Providers that tolerate more can raise these in their YAML config
         'CONCURRENT_REQUESTS': 1,
         'CONCURRENT_REQUESTS_PER_DOMAIN': 1,
         'ROBOTSTXT_OBEY': True,
@@ -67,6 +68,32 @@ class HtmlCollectorSpider(BaseHtmlCollectorSpider):
         },
     }
 
+    @classmethod
+    def update_settings(cls, settings):
+        """Apply the defaults above; provider overrides come in from_crawler."""
+        super().update_settings(settings)
+        settings.setdict(cls.custom_settings, priority='spider')
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        """
+        Create the spider, then apply its provider's settings.
+
+        The provider is only known once the spider exists, after Scrapy has
+        applied custom_settings; the crawler's settings stay writable until
+        the crawl starts (Scrapy 2.11+), so provider values set here win.
+        """
+        spider = super().from_crawler(crawler, *args, **kwargs)
+
+        overrides = spider._config.to_spider_settings() if spider._config else {}
+        overrides.pop('ITEM_PIPELINES', None)  # Don't override pipelines
+        # Disable pipelines for dry run mode
+        if spider.dry_run:
+            overrides['ITEM_PIPELINES'] = {}
+        crawler.settings.setdict(overrides, priority='spider')
+
+        return spider
+
     def __init__(self, provider='pesi', max_pages=None, dry_run=False, *args, **kwargs):
         """
         Initialize the HTML collector spider.
@@ -76,14 +103,6 @@ class HtmlCollectorSpider(BaseHtmlCollectorSpider):
             max_pages: Maximum number of pages to crawl
             dry_run: If 'true', don't store HTML, just log URLs
         """
-        # Handle dry_run before super().__init__ for settings
-        is_dry_run = dry_run if isinstance(dry_run, bool) else str(dry_run).lower() == 'true'
-
-        # Disable pipelines for dry run mode
-        if is_dry_run:
-            self.custom_settings = self.custom_settings.copy()
-            self.custom_settings['ITEM_PIPELINES'] = {}
-
         super().__init__(
             provider=provider,
             max_pages=max_pages,
@@ -91,11 +110,3 @@ class HtmlCollectorSpider(BaseHtmlCollectorSpider):
             *args,
             **kwargs
         )
-
-        # Merge provider-specific settings with custom_settings
-        if self._config:
-            provider_settings = self._config.to_spider_settings()
-            # Update our custom_settings with provider config
-            for key, value in provider_settings.items():
-                if key not in ['ITEM_PIPELINES']:  # Don't override pipelines
-                    self.custom_settings[key] = value
@@ -1,9 +1,204 @@
-from pathlib import Path
 import scrapy
 import time
 import re
 from datetime import datetime
-from scrapy.utils.response import open_in_browser
+from parsel.csstranslator import css2xpath
+
+from tutorial.items import CourseItem
+
+
+# Regex patterns are compiled once at import time
+_MONTHS = r'(January|February|March|April|May|June|July|August|September|October|November|December)'
+
+_EARN_UP_TO_RE = re.compile(r'(\d+\.?\d*)\s*CE\s*hours')
+_CE_HOURS_RE = re.compile(r'(\d+\.?\d*)\s*(?:CE\s*hours|clock\s*hours|continuing\s*education)')
+_DATA_ENTITY_CREDITS_RE = re.compile(r'(\d+\.?\d*)\s*(?:CE|clock|continuing)')
+_ANY_CREDITS_RE = re.compile(r'(\d+\.?\d*)\s*(?:CE|CEU|Credit)')
+_PRICE_TEXT_RE = re.compile(r'\$[\d,]+\.?\d*')
+
+_PRICE_RE = re.compile(r'\$?\s*([\d,]+)\.?(\d{2})?')
+_SIMPLE_NUM_RE = re.compile(r'(\d+\.?\d*)')
+# Hours and minutes in one scan; the two can't overlap, so the first hit of
+# each group is what separate searches would find
+_DURATION_RE = re.compile(
+    r'(?P<hours>\d+\.?\d*)\s*(?:hours?|hrs?|h\b)|(?P<minutes>\d+)\s*(?:minutes?|mins?|m\b)',
+    re.IGNORECASE
+)
+
+# Course type detection: any live wording, fused into one alternation.
+# Every in-person/self-paced match is also a live/on-demand match, so the
+# subtype checks can run first.
+_LIVE_RE = re.compile(
+    r'live\s*webinar|live\s*activity|in-person|in\s*person|'
+    r'register\s*for\s*this\s*live|live\s*seminar|live\s*workshop|'
+    r'live\s*event|live\s*training|attend\s*live',
+    re.IGNORECASE
+)
+_IN_PERSON_RE = re.compile(r'in[- ]?person', re.IGNORECASE)
+_SELF_PACED_RE = re.compile(r'self[- ]?paced', re.IGNORECASE)
+_DEADLINE_RE = re.compile(r'(register|deadline|expires?)\s*(?:by|before|:)?\s*(.+)', re.IGNORECASE)
+_DATE_RANGE_RE = re.compile(
+    _MONTHS + r'\s+(\d{1,2}),?\s+(\d{4})\s*[-–—]\s*' + _MONTHS + r'\s+(\d{1,2}),?\s+(\d{4})',
+    re.IGNORECASE
+)
+
+# Turns the raw selector dicts parse_course_detail yields into CourseItems
+FIELD_EXTRACTION_PIPELINE = 'tutorial.pipelines.field_extraction_pipeline.FieldExtractionPipeline'
+
+# Listing-page and detail-page selectors, translated from CSS to XPath
+# once at import time
+CARD_LINK_XPATH = css2xpath('.fcSlide .cardItem .name a')
+TITLE_XPATH = css2xpath('h1::text')
+INSTRUCTOR_XPATH = css2xpath('.presenter::text, .speaker::text, .instructor::text, .faculty::text')
+DESCRIPTION_XPATH = css2xpath('.productDescription *::text, .description *::text, .overview *::text')
+DATA_ENTITY_XPATH = css2xpath('.dataEntity p::text')
+PRICE_XPATH = css2xpath('.price::text, .priceValue::text, .calcPrice::text')
+ANY_PRICE_XPATH = css2xpath('[class*="price"]::text')
+ORIGINAL_PRICE_XPATH = css2xpath('.originalPrice::text, .regular-price::text')
+IMAGE_XPATH = css2xpath('img[class*="product"]::attr(src), img[class*="course"]::attr(src)')
+OG_IMAGE_XPATH = css2xpath('meta[property="og:image"]::attr(content)')
+DATE_XPATH = css2xpath('.date::text, .start-date::text, .eventDate::text')
+DURATION_XPATH = css2xpath('.duration::text, .length::text, .hours::text')
+CATEGORY_XPATH = css2xpath('.productType::text, .category::text, .type::text')
+DEADLINE_XPATH = css2xpath('.deadline::text, .registration-deadline::text')
+
+# Same nodes as css('body::text'), but only as many as are used
+BODY_TEXT_XPATH = 'descendant-or-self::body/text()[position() <= 100]'
+
+# Text nodes that could hold a credits figure: everything _CE_HOURS_RE or
+# _ANY_CREDITS_RE can match contains one of these
+CREDIT_TEXT_XPATH = (
+    '//text()[contains(., "CE") or contains(., "clock") '
+    'or contains(., "continuing") or contains(., "Credit")]'
+)
+
+# Byte-level prefilter for the same keywords (checked against the raw body)
+CREDIT_MARKERS = (b'CE', b'Credit', b'clock', b'continuing')
+
+# Field keywords, in priority order. Matching is plain substring matching,
+# so the lookahead lets hits overlap (e.g. 'therapy' inside 'family therapy')
+FIELD_KEYWORDS = (
+    ('mental_health', (
+        'mental health', 'therapy', 'therapist', 'psychotherapy', 'counseling',
+        'depression', 'anxiety', 'ptsd', 'trauma', 'addiction', 'substance abuse',
+        'behavioral health', 'mental illness', 'psychiatric', 'adhd', 'autism'
+    )),
+    ('psychology', (
+        'psychology', 'psychologist', 'cognitive', 'behavioral', 'neuropsychology',
+        'psychological assessment', 'psychological testing'
+    )),
+    ('counseling', (
+        'counselor', 'counseling', 'lmft', 'lpc', 'lmhc', 'family therapy',
+        'marriage counseling', 'couples therapy'
+    )),
+    ('nursing', (
+        'nursing', 'nurse', 'rn', 'bsn', 'nurse practitioner', 'clinical nursing',
+        'nursing ce', 'nursing continuing education'
+    )),
+    ('social_work', (
+        'social work', 'social worker', 'lsw', 'lcsw', 'licsw'
+    )),
+)
+_FIELD_BY_KEYWORD = {}
+for _rank, (_field, _keywords) in enumerate(FIELD_KEYWORDS):
+    for _keyword in _keywords:
+        _FIELD_BY_KEYWORD.setdefault(_keyword, (_rank, _field))
+# Single-word mental health keywords. A whole-word hit settles the field
+# (it is the top priority) without running the keyword scan.
+_MENTAL_HEALTH_WORDS = frozenset(
+    keyword for keyword in FIELD_KEYWORDS[0][1] if ' ' not in keyword
+)
+_FIELD_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(keyword) for keyword in _FIELD_BY_KEYWORD) + '))'
+)
+
+
+# Date strings _parse_date_string accepts, in one pattern:
+#   January 15, 2025 / January 15 2025 / Jan 15, 2025 / 01/15/2025 / 2025-01-15
+_MONTH_NUMBERS = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6,
+    'july': 7, 'august': 8, 'september': 9, 'october': 10, 'november': 11, 'december': 12,
+}
+_MONTH_ABBR_NUMBERS = {name[:3]: number for name, number in _MONTH_NUMBERS.items()}
+_PARSE_DATE_RE = re.compile(
+    r'(?P<month_name>[a-z]+)\s+(?P<named_day>\d{1,2})(?P<comma>,)?\s+(?P<named_year>\d{4})'
+    r'|(?P<us_month>\d{1,2})/(?P<us_day>\d{1,2})/(?P<us_year>\d{4})'
+    r'|(?P<iso_year>\d{4})-(?P<iso_month>\d{1,2})-(?P<iso_day>\d{1,2})',
+    re.IGNORECASE
+)
+
+
+def _month_number(name):
+    """Month number for a full month name, or None"""
+    return _MONTH_NUMBERS.get(name.lower())
+
+
+def _make_date(year, month, day):
+    """datetime from string/int parts, or None if they don't form a date"""
+    if month is None:
+        return None
+    try:
+        return datetime(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def _parse_date_string(text):
+    """Parse a date string into datetime
+
+    One regex match picks the format and the datetime is built from its
+    groups, rather than trying strptime formats until one stops raising.
+    Full month names may drop the comma; abbreviations need it ("Jan 15, 2025").
+    """
+    if not text:
+        return None
+
+    match = _PARSE_DATE_RE.fullmatch(text.strip())
+    if not match:
+        return None
+
+    if match.group('month_name'):
+        name = match.group('month_name').lower()
+        month = _MONTH_NUMBERS.get(name)
+        if month is None and match.group('comma'):
+            month = _MONTH_ABBR_NUMBERS.get(name)
+        return _make_date(match.group('named_year'), month, match.group('named_day'))
+    if match.group('us_month'):
+        return _make_date(match.group('us_year'), match.group('us_month'), match.group('us_day'))
+    return _make_date(match.group('iso_year'), match.group('iso_month'), match.group('iso_day'))
+
+
+def _strip(text):
+    """Stripped text, or None if empty"""
+    return (text or '').strip() or None
+
+
+def _join_limited(parts, limit):
+    """' '.join of the stripped, non-empty parts, cut to limit characters
+
+    Stops collecting once the limit is reached, so long descriptions aren't
+    joined in full only to be truncated.
+    """
+    kept = []
+    length = -1  # no separator before the first part
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        kept.append(part)
+        length += len(part) + 1
+        if length >= limit:
+            break
+    return ' '.join(kept)[:limit]
+
+
+def _first_group(pattern, texts):
+    """First group of the first match across texts, like SelectorList.re_first"""
+    for text in texts:
+        match = pattern.search(text)
+        if match:
+            return match.group(1)
+    return None
 
 
 class PesiSpider(scrapy.Spider):
@@ -16,13 +211,14 @@ class PesiSpider(scrapy.Spider):
     ]
     
     custom_settings = {
-        # Conservative politeness settings
-        'DOWNLOAD_DELAY': 10,
+        # Minimum spacing between requests; AutoThrottle raises it when
+        # the server slows down
+        'DOWNLOAD_DELAY': 1,
         'RANDOMIZE_DOWNLOAD_DELAY': True,
         
-        # Maximum politeness
-        'CONCURRENT_REQUESTS': 1,
-        'CONCURRENT_REQUESTS_PER_DOMAIN': 1,
+        # Enough parallel requests to keep the crawl from being latency-bound
+        'CONCURRENT_REQUESTS': 16,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 8,
         
         # Respect all politeness protocols
         'ROBOTSTXT_OBEY': True,
@@ -30,65 +226,90 @@ class PesiSpider(scrapy.Spider):
         # Professional User-Agent
         'USER_AGENT': 'Mozilla/5.0 (compatible; PoliteBot/1.0; Educational Testing)',
         
-        # Conservative AutoThrottle
+        # AutoThrottle adapts the delay to response latency, backing off
+        # up to 30s when the server is under load
         'AUTOTHROTTLE_ENABLED': True,
-        'AUTOTHROTTLE_START_DELAY': 3,
-        'AUTOTHROTTLE_MAX_DELAY': 15,
-        'AUTOTHROTTLE_TARGET_CONCURRENCY': 0.5,
+        'AUTOTHROTTLE_START_DELAY': 1,
+        'AUTOTHROTTLE_MAX_DELAY': 30,
+        'AUTOTHROTTLE_TARGET_CONCURRENCY': 4.0,
         'AUTOTHROTTLE_DEBUG': True,
         
+        # HTTP/1.1 keeps connections alive between requests; HTTP/2 is
+        # opt-in via PESI_HTTP2 (see from_crawler)
+        'REACTOR_THREADPOOL_MAXSIZE': 20,
+
         # Timeout settings
         'DOWNLOAD_TIMEOUT': 30,
+        'DOWNLOAD_MAXSIZE': 10_000_000,
+        'RETRY_TIMES': 2,
+        'RETRY_HTTP_CODES': [500, 502, 503, 504, 408, 429],
+
+        # Slow down as soon as the server rate-limits us (429/503)
+        'DOWNLOADER_MIDDLEWARES': {
+            'tutorial.middlewares.ThrottleOn429Middleware': 560,
+        },
         
         'LOG_LEVEL': 'INFO',
 
         # Limit depth to avoid crawling entire site
         'DEPTH_LIMIT': 2,
+
+        # Field extraction runs first, in the reactor thread pool
+        'ITEM_PIPELINES': {
+            FIELD_EXTRACTION_PIPELINE: 100,
+            'tutorial.pipelines.deduplication_pipeline.DeduplicationPipeline': 200,
+            'tutorial.pipelines.database_pipeline.DatabasePipeline': 300,
+        },
     }
 
-    # Course type detection patterns
-    LIVE_PATTERNS = [
-        r'live\s*webinar', r'live\s*activity', r'in-person', r'in\s*person',
-        r'register\s*for\s*this\s*live', r'live\s*seminar', r'live\s*workshop',
-        r'live\s*event', r'live\s*training', r'attend\s*live'
-    ]
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        # Items are raw until FieldExtractionPipeline has run, so it stays
+        # in even when ITEM_PIPELINES is overridden (e.g. with -s)
+        pipelines = crawler.settings.getdict('ITEM_PIPELINES')
+        if FIELD_EXTRACTION_PIPELINE not in pipelines:
+            pipelines[FIELD_EXTRACTION_PIPELINE] = 100
+            crawler.settings.set(
+                'ITEM_PIPELINES', pipelines,
+                priority=crawler.settings.getpriority('ITEM_PIPELINES')
+            )
 
-    ON_DEMAND_PATTERNS = [
-        r'self[- ]?paced', r'self[- ]?study', r'anytime\s*access', r'on[- ]?demand',
-        r'instant\s*access', r'watch\s*anytime', r'start\s*immediately',
-        r'available\s*now', r'recorded', r'home\s*study'
-    ]
+        # HTTP/2 multiplexes requests over one TLS connection per host, but
+        # Scrapy's handler needs h2 negotiated over ALPN and has no HTTP/1.1
+        # fallback (nor proxy support), so it is only used when asked for
+        if crawler.settings.getbool('PESI_HTTP2'):
+            crawler.settings.set('DOWNLOAD_HANDLERS', {
+                'https': 'scrapy.core.downloader.handlers.http2.H2DownloadHandler',
+            }, priority='spider')
+        return spider
 
-    def extract_course_type(self, response, title, description, category):
-        """Detect course type from page content"""
+    def extract_course_type(self, body_text, title, description, category):
+        """Detect course type from page content
+
+        body_text is the page's leading body text nodes (see parse_course_detail)
+        """
         # Combine all text to search
         page_text = ' '.join([
             title or '',
             description or '',
             category or '',
-            ' '.join(response.css('body::text').getall()[:50])  # First 50 text nodes
+            ' '.join(body_text[:50])  # First 50 text nodes
         ]).lower()
 
-        # Check for live patterns
-        for pattern in self.LIVE_PATTERNS:
-            if re.search(pattern, page_text, re.IGNORECASE):
-                # Check if it's specifically in-person
-                if re.search(r'in[- ]?person', page_text, re.IGNORECASE):
-                    return 'in_person'
-                return 'live_webinar'
-
-        # Check for on-demand patterns
-        for pattern in self.ON_DEMAND_PATTERNS:
-            if re.search(pattern, page_text, re.IGNORECASE):
-                # Check if it's specifically self-paced
-                if re.search(r'self[- ]?paced', page_text, re.IGNORECASE):
-                    return 'self_paced'
-                return 'on_demand'
-
-        # Default to on_demand
+        # Live wording wins; in-person is the specific live case
+        if _IN_PERSON_RE.search(page_text):
+            return 'in_person'
+        if _LIVE_RE.search(page_text):
+            return 'live_webinar'
+
+        # Anything else is on-demand (self-study, recorded, ...), unless
+        # it's specifically self-paced
+        if _SELF_PACED_RE.search(page_text):
+            return 'self_paced'
         return 'on_demand'
 
-    def extract_dates(self, response, date_str):
+    def extract_dates(self, deadline_indicators, body_text, date_str):
         """Extract and parse dates from page content
 
         Returns dict with start_date, end_date, registration_deadline
@@ -99,71 +320,55 @@ class PesiSpider(scrapy.Spider):
             'registration_deadline': None
         }
 
-        # Common date patterns
-        date_patterns = [
-            # January 15, 2025
-            r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})',
-            # 01/15/2025 or 1/15/2025
-            r'(\d{1,2})/(\d{1,2})/(\d{4})',
-            # 2025-01-15
-            r'(\d{4})-(\d{2})-(\d{2})',
-        ]
-
         # Get text from response for date searching
-        page_text = ' '.join(response.css('body::text').getall()[:100])
-
-        # Look for event date indicators
-        event_date_indicators = response.css('.date::text, .eventDate::text, .start-date::text').getall()
-        deadline_indicators = response.css('.deadline::text, .registration-deadline::text').getall()
-
-        def parse_date_string(text):
-            """Parse a date string into datetime"""
-            if not text:
-                return None
-
-            # Try different formats
-            formats = [
-                '%B %d, %Y',      # January 15, 2025
-                '%B %d %Y',       # January 15 2025
-                '%m/%d/%Y',       # 01/15/2025
-                '%Y-%m-%d',       # 2025-01-15
-                '%b %d, %Y',      # Jan 15, 2025
-            ]
-
-            for fmt in formats:
-                try:
-                    return datetime.strptime(text.strip(), fmt)
-                except ValueError:
-                    continue
-            return None
+        page_text = ' '.join(body_text[:100])
 
         # Extract from date_str if provided
         if date_str:
-            parsed = parse_date_string(date_str)
+            parsed = _parse_date_string(date_str)
             if parsed:
                 dates['start_date'] = parsed.isoformat()
 
         # Look for registration deadline
         for text in deadline_indicators:
             # Look for deadline pattern
-            deadline_match = re.search(r'(register|deadline|expires?)\s*(?:by|before|:)?\s*(.+)', text, re.IGNORECASE)
+            deadline_match = _DEADLINE_RE.search(text)
             if deadline_match:
-                parsed = parse_date_string(deadline_match.group(2))
+                parsed = _parse_date_string(deadline_match.group(2))
                 if parsed:
                     dates['registration_deadline'] = parsed.isoformat()
                     break
 
         # Look for date range (start - end)
-        range_pattern = r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})\s*[-–—]\s*(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})'
-        range_match = re.search(range_pattern, page_text, re.IGNORECASE)
+        range_match = _DATE_RANGE_RE.search(page_text)
         if range_match:
-            start_str = f"{range_match.group(1)} {range_match.group(2)}, {range_match.group(3)}"
-            end_str = f"{range_match.group(4)} {range_match.group(5)}, {range_match.group(6)}"
-            dates['start_date'] = parse_date_string(start_str).isoformat() if parse_date_string(start_str) else None
-            dates['end_date'] = parse_date_string(end_str).isoformat() if parse_date_string(end_str) else None
+            start = _make_date(range_match.group(3), _month_number(range_match.group(1)), range_match.group(2))
+            end = _make_date(range_match.group(6), _month_number(range_match.group(4)), range_match.group(5))
+            dates['start_date'] = start.isoformat() if start else None
+            dates['end_date'] = end.isoformat() if end else None
 
         return dates
 
+    def extract_credits(self, sel):
+        """Find the CE credits string, trying the likeliest locations first"""
+        # First try: "Earn up to X.X CE hours" pattern
+        credits = sel.xpath('//p[contains(text(), "Earn up to")]/text()').re_first(_EARN_UP_TO_RE)
+        if credits:
+            return credits
+
+        # Both whole-page patterns need one of these keywords, so one
+        # filtered walk replaces two full //text() scans
+        candidates = sel.xpath(CREDIT_TEXT_XPATH).getall()
+
+        return (
+            # Second try: "X.X continuing education" patterns
+            _first_group(_CE_HOURS_RE, candidates) or
+            # Third try: Look in dataEntity divs (the CE info sections)
+            sel.xpath(DATA_ENTITY_XPATH).re_first(_DATA_ENTITY_CREDITS_RE) or
+            # Last resort: any number followed by CE/credit keywords
+            _first_group(_ANY_CREDITS_RE, candidates)
+        )
+
     def parse_price(self, price_str):
         """Convert price string to numeric value (cents)
 
@@ -176,7 +381,7 @@ class PesiSpider(scrapy.Spider):
 
         # Remove currency symbols and extract number
         # Handle formats: $199.99, $1,299.00, $199, etc.
-        match = re.search(r'\$?\s*([\d,]+)\.?(\d{2})?', price_str)
+        match = _PRICE_RE.search(price_str)
         if match:
             dollars = match.group(1).replace(',', '')
             cents = match.group(2) or '00'
@@ -199,7 +404,7 @@ class PesiSpider(scrapy.Spider):
         original = credits_str.strip()
 
         # Extract number from patterns like "6.0", "6.0 CE hours", "6 credits"
-        match = re.search(r'(\d+\.?\d*)', credits_str)
+        match = _SIMPLE_NUM_RE.search(credits_str)
         if match:
             try:
                 numeric = float(match.group(1))
@@ -223,19 +428,25 @@ class PesiSpider(scrapy.Spider):
         # Handle hours and minutes patterns
         # "6 hours", "6h", "6 hrs", "360 minutes", "6 hours 30 minutes"
 
-        # Extract hours
-        hours_match = re.search(r'(\d+\.?\d*)\s*(?:hours?|hrs?|h\b)', duration_str, re.IGNORECASE)
-        if hours_match:
-            total_minutes += float(hours_match.group(1)) * 60
-
-        # Extract minutes
-        minutes_match = re.search(r'(\d+)\s*(?:minutes?|mins?|m\b)', duration_str, re.IGNORECASE)
-        if minutes_match:
-            total_minutes += int(minutes_match.group(1))
+        # Extract the first hours and first minutes figures
+        hours = minutes = None
+        for match in _DURATION_RE.finditer(duration_str):
+            if match.lastgroup == 'hours':
+                if hours is None:
+                    hours = match.group('hours')
+            elif minutes is None:
+                minutes = match.group('minutes')
+            if hours is not None and minutes is not None:
+                break
+
+        if hours is not None:
+            total_minutes += float(hours) * 60
+        if minutes is not None:
+            total_minutes += int(minutes)
 
         # If no specific time unit found but has a number, assume hours
         if total_minutes == 0:
-            simple_match = re.search(r'(\d+\.?\d*)', duration_str)
+            simple_match = _SIMPLE_NUM_RE.search(duration_str)
             if simple_match:
                 total_minutes = float(simple_match.group(1)) * 60
 
@@ -248,26 +459,24 @@ class PesiSpider(scrapy.Spider):
         """Main parse method - handles course listing pages"""
         self.logger.info(f'Crawled {response.url} at {time.strftime("%H:%M:%S")}')
         
-        # Extract course cards from the homepage sliders
-        # Based on actual HTML: .fcSlide .cardItem
-        course_cards = response.css('.fcSlide .cardItem')
-        self.logger.info(f'Found {len(course_cards)} course cards on page')
+        # Course cards from the homepage sliders (.fcSlide .cardItem); the
+        # link is inside .name a. One query selects the links themselves,
+        # and href and title are read off each link.
+        course_links = response.xpath(CARD_LINK_XPATH)
+        self.logger.info(f'Found {len(course_links)} course cards on page')
         
         # Follow links to individual course detail pages
-        for card in course_cards:
-            # The link is inside .name a
-            course_link = card.css('.name a::attr(href)').get()
+        for link in course_links:
+            course_link = link.attrib.get('href')
             
             if course_link:
-                # Make absolute URL
-                course_url = response.urljoin(course_link)
-                
                 # Extract basic info from card for reference
-                title = card.css('.name a::text').get()
+                title = link.xpath('text()').get()
                 
                 self.logger.info(f'Following course link: {title}')
-                yield scrapy.Request(
-                    course_url,
+                # follow() resolves the relative URL against the page
+                yield response.follow(
+                    course_link,
                     callback=self.parse_course_detail,
                     meta={'listing_url': response.url, 'title': title}
                 )
@@ -278,11 +487,14 @@ class PesiSpider(scrapy.Spider):
         """Parse individual course detail page to extract complete information"""
         self.logger.info(f'Parsing course detail: {response.url}')
         
+        # One Selector (and lxml tree) for every query below
+        sel = response.selector
+
         try:
-            # Course title
+            # Course title (each field is stripped once, here where it's read)
             title = (
-                response.css('h1::text').get() or
-                response.meta.get('title', '')
+                _strip(sel.xpath(TITLE_XPATH).get()) or
+                _strip(response.meta.get('title'))
             )
             
             if not title:
@@ -290,153 +502,155 @@ class PesiSpider(scrapy.Spider):
                 return
             
             # Instructors/Speakers - they're often in specific areas
-            instructors = response.css('.presenter::text, .speaker::text, .instructor::text, .faculty::text').getall()
+            instructors = sel.xpath(INSTRUCTOR_XPATH).getall()
             instructors_str = ', '.join([i.strip() for i in instructors if i.strip()])
             
             # Description - get the main course description
-            description_parts = response.css('.productDescription *::text, .description *::text, .overview *::text').getall()
-            description = ' '.join([d.strip() for d in description_parts if d.strip()])[:500]  # Limit to 500 chars
+            description_parts = sel.xpath(DESCRIPTION_XPATH).getall()
+            description = _join_limited(description_parts, 500)  # Limit to 500 chars
             
             # CEU Credits - CRITICAL: Multiple possible locations
             # PESI often shows this in a "CE Information" section or modal
             # Look for text containing CE, CEU, Credits, Hours
             # CEU Credits - Look for patterns like "6.0 CE hours" or "6.0 clock hours"
-            credits = (
-                # First try: "Earn up to X.X CE hours" pattern
-                response.xpath('//p[contains(text(), "Earn up to")]/text()').re_first(r'(\d+\.?\d*)\s*CE\s*hours') or
-                # Second try: "X.X continuing education" patterns
-                response.xpath('//text()').re_first(r'(\d+\.?\d*)\s*(?:CE\s*hours|clock\s*hours|continuing\s*education)') or
-                # Third try: Look in dataEntity divs (the CE info sections)
-                response.css('.dataEntity p::text').re_first(r'(\d+\.?\d*)\s*(?:CE|clock|continuing)') or
-                # Last resort: any number followed by CE/credit keywords
-                response.xpath('//text()').re_first(r'(\d+\.?\d*)\s*(?:CE|CEU|Credit)')
-            )
+            # Every credits pattern needs one of these words, so pages
+            # without them skip the credit queries
+            body = response.body
+            if any(marker in body for marker in CREDIT_MARKERS):
+                credits = self.extract_credits(sel)
+            else:
+                credits = None
                         
             # Price information
             price = (
-                response.css('.price::text, .priceValue::text, .calcPrice::text').get() or
-                response.css('[class*="price"]::text').re_first(r'\$[\d,]+\.?\d*')
+                sel.xpath(PRICE_XPATH).get() or
+                sel.xpath(ANY_PRICE_XPATH).re_first(_PRICE_TEXT_RE)
             )
             
-            original_price = response.css('.originalPrice::text, .regular-price::text').get()
+            original_price = sel.xpath(ORIGINAL_PRICE_XPATH).get()
             
             # Course image
             image_url = (
-                response.css('img[class*="product"]::attr(src), img[class*="course"]::attr(src)').get() or
-                response.css('meta[property="og:image"]::attr(content)').get()
+                sel.xpath(IMAGE_XPATH).get() or
+                sel.xpath(OG_IMAGE_XPATH).get()
             )
             
             # Date/Duration
-            date = response.css('.date::text, .start-date::text, .eventDate::text').get()
-            duration = response.css('.duration::text, .length::text, .hours::text').get()
+            date = _strip(sel.xpath(DATE_XPATH).get())
+            duration = sel.xpath(DURATION_XPATH).get()
             
             # Category/Product Type
-            category = (
-                response.css('.productType::text, .category::text, .type::text').get() or
+            category = _strip(
+                sel.xpath(CATEGORY_XPATH).get() or
                 'Online Course'
             )
             
-            # Determine field
-            field = self.categorize_field(title, description, category)
-            
-            # Parse numeric values
-            price_numeric, price_string = self.parse_price(price)
-            original_price_numeric, original_price_string = self.parse_price(original_price)
-            credits_numeric, credits_string = self.parse_credits(credits)
-            duration_minutes, duration_string = self.parse_duration_minutes(duration)
-
-            # Extract course type
-            course_type = self.extract_course_type(response, title, description, category)
-
-            # Extract dates
-            dates = self.extract_dates(response, date.strip() if date else None)
-
-            # Build course data
-            course_data = {
-                'title': title.strip() if title else None,
+            # Leading body text nodes for course type and date detection,
+            # fetched once; the position() test stops at the 100 we use
+            body_text = sel.xpath(BODY_TEXT_XPATH).getall()
+
+            # Raw selector output only; FieldExtractionPipeline runs
+            # extract_fields on it off the reactor thread
+            yield {
+                'title': title,
                 'url': response.url,
-                'instructors': instructors_str if instructors_str else None,
+                'instructors': instructors_str,
                 'image_url': response.urljoin(image_url) if image_url else None,
-                'description': description.strip() if description else None,
-                # Numeric values for database
-                'price': price_numeric,
-                'original_price': original_price_numeric,
-                'credits': credits_numeric,
-                'duration': duration_minutes,
-                # Keep original strings for display
-                'price_string': price_string,
-                'original_price_string': original_price_string,
-                'credits_string': credits_string,
-                'duration_string': duration_string,
-                # Course type and dates
-                'course_type': course_type,
-                'start_date': dates['start_date'],
-                'end_date': dates['end_date'],
-                'registration_deadline': dates['registration_deadline'],
-                # Other fields
-                'date': date.strip() if date else None,
-                'category': category.strip() if category else None,
-                'field': field,
+                'description': description,
+                'credits': credits,
+                'price': price,
+                'original_price': original_price,
+                'date': date,
+                'duration': duration,
+                'category': category,
+                'body_text': body_text,
+                'deadline_indicators': sel.xpath(DEADLINE_XPATH).getall(),
                 'source_url': response.meta.get('listing_url'),
                 'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'provider': 'pesi'
             }
             
-            # Log what we found
-            credits_found = f"Credits: {credits}" if credits else "NO CREDITS FOUND"
-            self.logger.info(f'✓ Extracted: {title.strip()[:50]}... ({credits_found})')
-            yield course_data
-            
         except Exception as e:
             self.logger.error(f'Error parsing course detail {response.url}: {e}')
     
+    def extract_fields(self, raw):
+        """Build the CourseItem from parse_course_detail's raw output
+
+        Pure regex/keyword work with no selector access, so it is safe to run
+        in a worker thread (see FieldExtractionPipeline).
+        """
+        title = raw['title']
+        description = raw['description']
+        category = raw['category']
+        credits = raw['credits']
+
+        # Determine field
+        field = self.categorize_field(title, description, category)
+
+        # Parse numeric values
+        price_numeric, price_string = self.parse_price(raw['price'])
+        original_price_numeric, original_price_string = self.parse_price(raw['original_price'])
+        credits_numeric, credits_string = self.parse_credits(credits)
+        duration_minutes, duration_string = self.parse_duration_minutes(raw['duration'])
+
+        # Extract course type
+        course_type = self.extract_course_type(raw['body_text'], title, description, category)
+
+        # Extract dates
+        dates = self.extract_dates(raw['deadline_indicators'], raw['body_text'], raw['date'])
+
+        course = CourseItem(
+            title=title,
+            url=raw['url'],
+            instructors=raw['instructors'] or None,
+            image_url=raw['image_url'],
+            description=description or None,
+            # Numeric values for database
+            price=price_numeric,
+            original_price=original_price_numeric,
+            credits=credits_numeric,
+            duration=duration_minutes,
+            # Keep original strings for display
+            price_string=price_string,
+            original_price_string=original_price_string,
+            credits_string=credits_string,
+            duration_string=duration_string,
+            # Course type and dates
+            course_type=course_type,
+            start_date=dates['start_date'],
+            end_date=dates['end_date'],
+            registration_deadline=dates['registration_deadline'],
+            # Other fields
+            date=raw['date'],
+            category=category,
+            field=field,
+            source_url=raw['source_url'],
+            scraped_at=raw['scraped_at'],
+            provider='pesi'
+        )
+
+        # Log what we found
+        credits_found = f"Credits: {credits}" if credits else "NO CREDITS FOUND"
+        self.logger.info(f'✓ Extracted: {title[:50]}... ({credits_found})')
+        return course
+
     def categorize_field(self, title, description, category):
         """Categorize course into field based on keywords"""
         if not title:
             return 'other'
         
         text_to_check = f"{title} {description or ''} {category or ''}".lower()
-        
-        # Mental health keywords
-        mental_health_keywords = [
-            'mental health', 'therapy', 'therapist', 'psychotherapy', 'counseling',
-            'depression', 'anxiety', 'ptsd', 'trauma', 'addiction', 'substance abuse',
-            'behavioral health', 'mental illness', 'psychiatric', 'adhd', 'autism'
-        ]
-        
-        # Psychology keywords
-        psychology_keywords = [
-            'psychology', 'psychologist', 'cognitive', 'behavioral', 'neuropsychology',
-            'psychological assessment', 'psychological testing'
-        ]
-        
-        # Counseling keywords
-        counseling_keywords = [
-            'counselor', 'counseling', 'lmft', 'lpc', 'lmhc', 'family therapy',
-            'marriage counseling', 'couples therapy'
-        ]
-        
-        # Nursing keywords
-        nursing_keywords = [
-            'nursing', 'nurse', 'rn', 'bsn', 'nurse practitioner', 'clinical nursing',
-            'nursing ce', 'nursing continuing education'
-        ]
-        
-        # Social work keywords
-        social_work_keywords = [
-            'social work', 'social worker', 'lsw', 'lcsw', 'licsw'
-        ]
-        
-        # Check for matches
-        if any(keyword in text_to_check for keyword in mental_health_keywords):
+
+        if not _MENTAL_HEALTH_WORDS.isdisjoint(text_to_check.split()):
             return 'mental_health'
-        elif any(keyword in text_to_check for keyword in psychology_keywords):
-            return 'psychology'
-        elif any(keyword in text_to_check for keyword in counseling_keywords):
-            return 'counseling'
-        elif any(keyword in text_to_check for keyword in nursing_keywords):
-            return 'nursing'
-        elif any(keyword in text_to_check for keyword in social_work_keywords):
-            return 'social_work'
-        else:
-            return 'other'
\ No newline at end of file
+
+        # One scan finds every keyword hit; the earliest field in
+        # FIELD_KEYWORDS wins, as the old elif chain did
+        best = None
+        for match in _FIELD_RE.finditer(text_to_check):
+            rank, field = _FIELD_BY_KEYWORD[match.group(1)]
+            if rank == 0:
+                return field
+            if best is None or rank < best[0]:
+                best = (rank, field)
+
+        return best[1] if best else 'other'
@@ -1,8 +1,177 @@
+import gzip
+from functools import partial
 from pathlib import Path
 
 import scrapy
 import time
+from urllib.parse import urlsplit
 from scrapy.utils.response import open_in_browser
+from twisted.internet.threads import deferToThread
+from lxml import etree
+from parsel.csstranslator import css2xpath
+
+# Lexbor parses and queries HTML several times faster than lxml; when
+# selectolax is installed it takes over PESI card extraction
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
+
+# Pages at least this large are saved gzipped. Level 1 is several times
+# faster than the default and HTML still shrinks a lot.
+GZIP_SAVE_THRESHOLD = 256 * 1024
+GZIP_SAVE_LEVEL = 1
+
+
+def _save_page(filename, body):
+    """Write a page body to disk, gzipping large ones; returns (path, bytes written)"""
+    if len(body) < GZIP_SAVE_THRESHOLD:
+        return filename, Path(filename).write_bytes(body)
+
+    filename = f'{filename}.gz'
+    with gzip.open(filename, 'wb', compresslevel=GZIP_SAVE_LEVEL) as f:
+        f.write(body)
+    return filename, Path(filename).stat().st_size
+
+
+COURSE_CARDS_XPATH = css2xpath('.fcSlide .cardItem')
+
+
+def _has_class(name):
+    """XPath predicate for a class token, as parsel's CSS translator writes it"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Classes that mark a field on a PESI card. One query collects every element
+# carrying any of them, so the card subtree is walked once rather than once
+# per field; the reads below then only look inside those elements.
+_CARD_FIELD_CLASSES = (
+    'name', 'speakers', 'imgCol', 'description', 'calcPrice', 'priceValue',
+    'originalPrice', 'date', 'duration', 'credits', 'productType',
+)
+_CARD_FIELDS = etree.XPath(
+    'descendant-or-self::*[@class and ({})]'.format(
+        ' or '.join(_has_class(name) for name in _CARD_FIELD_CLASSES)
+    )
+)
+
+# field -> (class of the owning element, XPath relative to that element)
+_FIELD_READS = {key: (cls, etree.XPath(path, smart_strings=False)) for key, (cls, path) in {
+    'title': ('name', 'descendant::a/descendant-or-self::text()'),
+    'url': ('name', 'descendant::a/@href'),
+    'speakers': ('speakers', 'descendant::a/text()'),
+    'image_data_src': ('imgCol', 'descendant::img/@data-src'),
+    'image_src': ('imgCol', 'descendant::img/@src'),
+    'description': ('description', 'text()'),
+    'calc_price': ('calcPrice', 'text()'),
+    'price_value': ('priceValue', 'text()'),
+    'original_price': ('originalPrice', 'text()'),
+    'date': ('date', 'text()'),
+    'duration': ('duration', 'text()'),
+    'credits': ('credits', 'text()'),
+    'product_type_item': ('productType', f"descendant::*[@class and {_has_class('item')}]/text()"),
+    'product_type_span': ('productType', 'descendant::span/text()'),
+    'product_type': ('productType', 'text()'),
+}.items()}
+
+
+def _card_fields(card):
+    """Group a card's field elements by class, from a single walk of the card"""
+    fields = {}
+    for element in _CARD_FIELDS(card):
+        for cls in element.get('class').split():
+            fields.setdefault(cls, []).append(element)
+    return fields
+
+
+def _read_all(fields, key):
+    """Every value of one field, in document order"""
+    cls, read = _FIELD_READS[key]
+    return [value for element in fields.get(cls, ()) for value in read(element)]
+
+
+def _read(fields, key):
+    """First value of one field, or None"""
+    cls, read = _FIELD_READS[key]
+    for element in fields.get(cls, ()):
+        values = read(element)
+        if values:
+            return values[0]
+    return None
+
+
+def _stripped(value):
+    """value stripped, or None if it is empty or missing"""
+    return value.strip() if value else None
+
+
+def _card_reader(card):
+    """(read, read_all) field accessors for a parsel card selector"""
+    fields = _card_fields(card.root)
+    return partial(_read, fields), partial(_read_all, fields)
+
+
+# The same fields for the selectolax path, read the way parsel's ::text
+# and ::attr() would: first direct text node, first text node anywhere
+# below, or an attribute value
+def _lexbor_text(node):
+    return [child.text_content for child in node.iter(include_text=True) if child.tag == '-text']
+
+
+def _lexbor_deep_text(node):
+    return [child.text_content for child in node.traverse(include_text=True) if child.tag == '-text']
+
+
+def _lexbor_attr(name):
+    def read(node):
+        attributes = node.attributes
+        if name not in attributes:
+            return []
+        return [attributes[name] or '']
+    return read
+
+
+PESI_CARDS_CSS = '.fcSlide .cardItem'
+
+_LEXBOR_READS = {
+    'title': ('.name a', _lexbor_deep_text),
+    'url': ('.name a', _lexbor_attr('href')),
+    'speakers': ('.speakers a', _lexbor_text),
+    'image_data_src': ('.imgCol img', _lexbor_attr('data-src')),
+    'image_src': ('.imgCol img', _lexbor_attr('src')),
+    'description': ('.description', _lexbor_text),
+    'calc_price': ('.calcPrice', _lexbor_text),
+    'price_value': ('.priceValue', _lexbor_text),
+    'original_price': ('.originalPrice', _lexbor_text),
+    'date': ('.date', _lexbor_text),
+    'duration': ('.duration', _lexbor_text),
+    'credits': ('.credits', _lexbor_text),
+    'product_type_item': ('.productType .item', _lexbor_text),
+    'product_type_span': ('.productType span', _lexbor_text),
+    'product_type': ('.productType', _lexbor_text),
+}
+
+
+def _lexbor_read_all(card, key):
+    css, read = _LEXBOR_READS[key]
+    return [value for node in card.css(css) for value in read(node)]
+
+
+def _lexbor_read(card, key):
+    css, read = _LEXBOR_READS[key]
+    for node in card.css(css):
+        values = read(node)
+        if values:
+            return values[0]
+    return None
+
+
+def _lexbor_card_reader(card):
+    """(read, read_all) field accessors for a selectolax card node"""
+    return partial(_lexbor_read, card), partial(_lexbor_read_all, card)
+
 
 # Alternative version with even more conservative settings
 class ExtraPoliteSpider(scrapy.Spider):
@@ -19,6 +188,22 @@ class ExtraPoliteSpider(scrapy.Spider):
         # "https://www.extension.harvard.edu/",
     ]
     
+    # Overridden from the SAVE_RAW_HTML setting in from_crawler
+    save_raw_html = False
+
+    # domain -> ((path prefix, extractor method name), ...), most specific
+    # prefix first. Built once here, looked up per response by domain.
+    EXTRACTORS = {
+        'www.pesi.com': (
+            ('/find/', 'extract_find_pesi_courses'),
+            ('/', 'extract_pesi_courses'),
+        ),
+        # 'www.freece.com': (('/', 'extract_freece_courses'),),
+        # 'www.ceufast.com': (('/', 'extract_ceufast_courses'),),
+        # 'continuinged.uw.edu': (('/', 'extract_uw_courses'),),
+        # 'www.extension.harvard.edu': (('/', 'extract_harvard_courses'),),
+    }
+    
     custom_settings = {
         # Even longer delays
         'DOWNLOAD_DELAY': 10,
@@ -74,122 +259,145 @@ class ExtraPoliteSpider(scrapy.Spider):
     #         'content_length': len(response.body),
     #         'article_count': len(articles)
     #     }
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.save_raw_html = crawler.settings.getbool('SAVE_RAW_HTML', False)
+        return spider
+
     def parse(self, response):
         # Log the request to show politeness in action
         self.logger.info(f'Crawled {response.url} at {time.strftime("%H:%M:%S")}')
         
-        # Save the full HTML for reference
-        page_section = response.url.split("/")[-1].split("?")[0] or "homepage"
-        timestamp = int(time.time())
-        filename = f"ceu_page_{page_section}_{timestamp}.html"
-        
-        output_path = Path(filename)
-        output_path.write_bytes(response.body)
-        self.logger.info(f'Saved page to {filename} ({len(response.body)} bytes)')
+        parts = urlsplit(response.url)
+
+        # Save the full HTML for reference (SAVE_RAW_HTML setting)
+        if self.save_raw_html:
+            self.save_page(response, parts)
         
-        # Dispatch to appropriate extractor based on domain
-        domain = response.url.split('/')[2]  # Extract domain
-        extractor_method = self.get_extractor_for_domain(domain)
+        # Dispatch to appropriate extractor based on domain and path
+        extractor_method = self.get_extractor_for_domain(parts.netloc, parts.path)
         
         # Use generator delegation for cleaner code
         if extractor_method:
             yield from extractor_method(response)
         else:
-            self.logger.warning(f'No extractor found for domain: {domain}')
+            self.logger.warning(f'No extractor found for domain: {parts.netloc}')
+
+    def save_page(self, response, parts):
+        """Write the page body to a timestamped file in the reactor thread pool"""
+        page_section = parts.path.rsplit('/', 1)[-1] or "homepage"
+        timestamp = int(time.time())
+        filename = f"ceu_page_{page_section}_{timestamp}.html"
+        
+        # Write in the reactor thread pool so the save doesn't hold up scheduling
+        saved = deferToThread(_save_page, filename, response.body)
+        saved.addCallbacks(
+            lambda result: self.logger.info(f'Saved page to {result[0]} ({result[1]} bytes)'),
+            lambda failure: self.logger.error(f'Failed to save {filename}: {failure.value}')
+        )
     
 
-    def get_extractor_for_domain(self, domain):
-        """Return the appropriate extraction method for each domain"""
-        extractors = {
-            'www.pesi.com': self.extract_pesi_courses,
-            'www.pesi.com/find/?category=Mental%20Health': self.extract_find_pesi_courses,
-            # 'www.freece.com': self.extract_freece_courses,
-            # 'www.ceufast.com': self.extract_ceufast_courses,
-            # 'continuinged.uw.edu': self.extract_uw_courses,
-            # 'www.extension.harvard.edu': self.extract_harvard_courses,
-        }
-        return extractors.get(domain)
+    def get_extractor_for_domain(self, domain, path='/'):
+        """Return the appropriate extraction method for a domain and URL path"""
+        path = path or '/'
+        for prefix, method_name in self.EXTRACTORS.get(domain, ()):
+            if path.startswith(prefix):
+                return getattr(self, method_name)
+        return None
 
     def extract_find_pesi_courses(self, response):
-        return
+        """Find/search result pages list the same course cards as the homepage"""
+        yield from self.extract_pesi_courses(response)
 
     def extract_pesi_courses(self, response):
         """Extract CEU course information from PESI website"""
-        courses = response.css('.fcSlide .cardItem')
+        if HAS_SELECTOLAX:
+            courses = LexborHTMLParser(response.text).css(PESI_CARDS_CSS)
+            card_reader = _lexbor_card_reader
+        else:
+            courses = response.xpath(COURSE_CARDS_XPATH)
+            card_reader = _card_reader
         self.logger.info(f'Found {len(courses)} CEU courses on PESI page')
+
+        # Same for every course on the page
+        source_url = response.url
+        scraped_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        urljoin = response.urljoin
         
         for course in courses:
-            try:
-                # Course title and link
-                title_element = course.css('.name a')
-                title = title_element.css('::text').get()
-                course_url = title_element.css('::attr(href)').get()
-                
-                # Make relative URLs absolute
-                if course_url and not course_url.startswith('http'):
-                    course_url = response.urljoin(course_url)
-                
-                # Speakers/Instructors
-                speakers = course.css('.speakers a::text').get()
-                
-                # Course image
-                image_url = course.css('.imgCol img::attr(data-src)').get()
-                if not image_url:
-                    image_url = course.css('.imgCol img::attr(src)').get()
-                
-                # Additional info that might be present
-                description = course.css('.description::text').get()
-                # Price extraction - handle multiple HTML structures  
-                price = course.css('.calcPrice::text').get() or course.css('.priceValue::text').get()
-                original_price = course.css('.originalPrice::text').get()
-
-                # If no original price found with .originalPrice, try looking for second .priceValue
-                if not original_price:
-                    all_price_values = course.css('.priceValue::text').getall()
-                    if len(all_price_values) > 1:
-                        original_price = all_price_values[1]
-
-                date = course.css('.date::text').get()
-                duration = course.css('.duration::text').get()
-                credits = course.css('.credits::text').get()
-                product_type = (course.css('.productType .item::text').get() or 
-                    course.css('.productType span::text').get() or
-                    course.css('.productType::text').get())
-                
-                if title:  # Only yield if we found a title
-                    course_data = {
-                        'title': title.strip() if title else None,
-                        'url': course_url,
-                        'instructors': speakers.strip() if speakers else None,
-                        'image_url': image_url,
-                        'description': description.strip() if description else None,
-                        'price': price.strip() if price else None,
-                        'original_price': original_price.strip() if original_price else None,
-                        'date': date.strip() if date else None,
-                        'duration': duration.strip() if duration else None,
-                        'credits': credits.strip() if credits else None,
-                        'product_type': product_type.strip() if product_type else None,
-                        'source_url': response.url,
-                        'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-                        'provider': 'pesi'
-                    }
-
-                     # Follow the course URL to get detailed info
-                     # can add this functionality later
-                    # yield response.follow(
-                    #     course_url,
-                    #     callback=self.parse_pesi_course_detail,
-                    #     meta={'course_data': course_data},  # Pass basic data to detail parser
-                    #     dont_filter=True  # Allow following the same URL multiple times if needed
-                    # )
-                    
-                    self.logger.info(f'Extracted PESI course: {title.strip()}')
-                    yield course_data
-                    
-            except Exception as e:
-                self.logger.error(f'Error extracting PESI course info: {e}')
+            read, read_all = card_reader(course)
+
+            # Course title - cards without one are skipped before reading anything else
+            title = read('title')
+            if not title:
                 continue
 
+            # Make relative URLs absolute
+            course_url = read('url')
+            if course_url and not course_url.startswith('http'):
+                try:
+                    course_url = urljoin(course_url)
+                except ValueError as e:
+                    self.logger.error(f'Bad PESI course URL {course_url!r}: {e}')
+                    course_url = None
+            
+            # Speakers/Instructors
+            speakers = read('speakers')
+            
+            # Course image
+            image_url = read('image_data_src')
+            if not image_url:
+                image_url = read('image_src')
+            
+            # Additional info that might be present
+            description = read('description')
+            # Price extraction - handle multiple HTML structures  
+            price = read('calc_price') or read('price_value')
+            original_price = read('original_price')
+
+            # If no original price found with .originalPrice, try looking for second .priceValue
+            if not original_price:
+                all_price_values = read_all('price_value')
+                if len(all_price_values) > 1:
+                    original_price = all_price_values[1]
+
+            date = read('date')
+            duration = read('duration')
+            credits = read('credits')
+            product_type = (read('product_type_item') or
+                read('product_type_span') or
+                read('product_type'))
+            
+            course_data = {
+                'title': _stripped(title),
+                'url': course_url,
+                'instructors': _stripped(speakers),
+                'image_url': image_url,
+                'description': _stripped(description),
+                'price': _stripped(price),
+                'original_price': _stripped(original_price),
+                'date': _stripped(date),
+                'duration': _stripped(duration),
+                'credits': _stripped(credits),
+                'product_type': _stripped(product_type),
+                'source_url': source_url,
+                'scraped_at': scraped_at,
+                'provider': 'pesi'
+            }
+
+             # Follow the course URL to get detailed info
+             # can add this functionality later
+            # yield response.follow(
+            #     course_url,
+            #     callback=self.parse_pesi_course_detail,
+            #     meta={'course_data': course_data},  # Pass basic data to detail parser
+            #     dont_filter=True  # Allow following the same URL multiple times if needed
+            # )
+            
+            self.logger.info(f"Extracted PESI course: {course_data['title']}")
+            yield course_data
+
     # def parse_pesi_course_detail(self, response):
     #     """Parse individual course detail page to extract additional information"""
         
@@ -1,6 +1,32 @@
+import re
+
 import scrapy
 from scrapy.crawler import CrawlerProcess
 
+
+# Only text nodes that could hold a credit mention; libxml2 filters the rest
+# so the regexes below see a handful of strings instead of every text node
+CREDIT_TEXT_XPATH = (
+    "//text()[contains(., 'CE') or contains(., 'Credit') or contains(., 'Hour')]"
+)
+
+CREDIT_LINE_RE = re.compile(r'.*(?:\d+\.?\d*)\s*(?:CE|Credit|CEU|Hour).*')
+
+# The section 3 patterns fused into one scan; the group name says which matched
+CREDIT_PATTERNS_RE = re.compile(
+    r'(?P<ce_credits>\d+\.?\d*)\s*CE\s*Credits?'
+    r'|(?P<ceu>\d+\.?\d*)\s*CEU'
+    r'|(?P<hours>\d+\.?\d*)\s*Hour'
+    r'|(?P<contact_hours>\d+\.?\d*)\s*Contact\s*Hour'
+)
+CREDIT_PATTERN_LABELS = (
+    ('ce_credits', 'X.X CE Credit(s)'),
+    ('ceu', 'X.X CEU'),
+    ('hours', 'X.X Hour(s)'),
+    ('contact_hours', 'X.X Contact Hour(s)'),
+)
+
+
 class TestCESpider(scrapy.Spider):
     name = "test_ce"
     start_urls = ["https://www.pesi.com/item/changing-adhd-brain-moving-medication-138948"]
@@ -18,7 +44,8 @@ class TestCESpider(scrapy.Spider):
         
         # 1. Look for any text containing CE, Credit, CEU, Hour
         print("\n1. All text containing CE/Credit/CEU/Hour:")
-        ce_texts = response.xpath('//text()').re(r'.*(?:\d+\.?\d*)\s*(?:CE|Credit|CEU|Hour).*')
+        candidates = response.xpath(CREDIT_TEXT_XPATH).getall()
+        ce_texts = [line for text in candidates for line in CREDIT_LINE_RE.findall(text)]
         for text in ce_texts[:10]:
             print(f"   {text.strip()}")
         
@@ -39,15 +66,13 @@ class TestCESpider(scrapy.Spider):
         
         # 3. Search entire HTML for CE patterns
         print("\n3. Regex search for CE patterns:")
-        patterns = [
-            (r'(\d+\.?\d*)\s*CE\s*Credits?', 'X.X CE Credit(s)'),
-            (r'(\d+\.?\d*)\s*CEU', 'X.X CEU'),
-            (r'(\d+\.?\d*)\s*Hour', 'X.X Hour(s)'),
-            (r'(\d+\.?\d*)\s*Contact\s*Hour', 'X.X Contact Hour(s)'),
-        ]
+        found = {name: [] for name, _ in CREDIT_PATTERN_LABELS}
+        for text in candidates:
+            for match in CREDIT_PATTERNS_RE.finditer(text):
+                found[match.lastgroup].append(match.group(match.lastgroup))
         
-        for pattern, desc in patterns:
-            matches = response.xpath('//text()').re(pattern)
+        for name, desc in CREDIT_PATTERN_LABELS:
+            matches = found[name]
             if matches:
                 print(f"   ✓ {desc}: {matches}")
         
@@ -4,15 +4,135 @@ Selector Tester - Test CSS and XPath selectors against web pages.
 Provides tools for testing selectors before adding them to provider configs.
 """
 
-from typing import List, Optional, Any, Dict
+import asyncio
+import gzip
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Any, Dict, Tuple, Union
 from urllib.parse import urljoin
 
 try:
-    import requests
+    from lxml import etree
+    from lxml import html as lxml_html
     from parsel import Selector
-    HAS_DEPS = True
+    HAS_PARSEL = True
+except ImportError:
+    HAS_PARSEL = False
+
+try:
+    import requests
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
+
+# httpx is preferred when installed: pooled connections that carry over
+# between fetches in a session, over HTTP/2 when h2 is also installed
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+try:
+    import h2  # noqa: F401 - enables httpx's HTTP/2 support
+    HAS_H2 = True
 except ImportError:
-    HAS_DEPS = False
+    HAS_H2 = False
+
+HAS_DEPS = HAS_PARSEL and (HAS_HTTPX or HAS_REQUESTS)
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+
+# Cached pages are gzipped; level 1 is fast and HTML still shrinks several times
+CACHE_COMPRESSLEVEL = 1
+
+# Pages kept in the HTML cache; the least recently used is dropped past this
+CACHE_MAXSIZE = 128
+
+# Bytes handed to the parser at a time while a page downloads
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Concurrent connections used by fetch_many
+FETCH_MANY_CONNECTIONS = 10
+
+# Threads used to test find_best_selector candidates; lxml releases the GIL
+# while it evaluates a query
+FIND_BEST_WORKERS = 8
+
+# Namespaces parsel registers for every query, so re:test() etc. keep working
+XPATH_NAMESPACES = {
+    're': 'http://exslt.org/regular-expressions',
+    'set': 'http://exslt.org/sets',
+}
+
+
+@lru_cache(maxsize=256)
+def _compile_xpath(expr: str):
+    """Compile an XPath expression once; repeat tests reuse the compiled form."""
+    return etree.XPath(expr, namespaces=XPATH_NAMESPACES, smart_strings=False)
+
+
+def _decode(body: bytes, encoding: Optional[str]) -> str:
+    """Decode a fetched page, replacing undecodable bytes as requests does."""
+    try:
+        return body.decode(encoding or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+def _parse_stream(chunks, encoding: str) -> Tuple[bytes, Optional['Selector']]:
+    """
+    Read a page body while feeding it to lxml as it downloads.
+
+    Parsing overlaps the download instead of starting after it. Returns
+    the body and a Selector over it, or None for the Selector when the
+    body holds no parseable document (or the encoding is unknown).
+    """
+    try:
+        parser = lxml_html.HTMLParser(encoding=encoding, recover=True, huge_tree=True)
+    except LookupError:
+        parser = None
+
+    body = []
+    for chunk in chunks:
+        body.append(chunk)
+        if parser is not None:
+            parser.feed(chunk)
+
+    root = None
+    if parser is not None:
+        try:
+            root = parser.close()
+        except etree.LxmlError:
+            pass
+    return b''.join(body), Selector(root=root, type='html') if root is not None else None
+
+
+def _specificity(selector: str) -> Tuple[int, int]:
+    """
+    Sort key putting more specific CSS selectors first.
+
+    Substring attribute matches ([class*="course"]) are fuzzy and go last;
+    otherwise selectors with more class/attribute/path tokens come first.
+    """
+    query = selector.split('::', 1)[0]
+    tokens = query.count('.') + query.count('[') + query.count('/')
+    return query.count('*='), -tokens
+
+
+def _xpath_getall(sel: 'Selector', expr: str) -> List[str]:
+    """sel.xpath(expr).getall(), evaluated with a precompiled expression."""
+    result = _compile_xpath(expr)(sel.root)
+    if not isinstance(result, list):
+        result = [result]
+    return [Selector(root=item, type='html').get() for item in result]
 
 
 class SelectorTester:
@@ -45,16 +165,41 @@ class SelectorTester:
         """Initialize the selector tester."""
         if not HAS_DEPS:
             raise ImportError(
-                "SelectorTester requires 'requests' and 'parsel'. "
-                "Install with: pip install requests parsel"
+                "SelectorTester requires 'parsel' and either 'httpx' or 'requests'. "
+                "Install with: pip install parsel httpx"
             )
 
         self.user_agent = user_agent or 'Mozilla/5.0 (compatible; CEUExplorer/1.0)'
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': self.user_agent})
-
-        # Cache for fetched HTML
-        self._cache: Dict[str, str] = {}
+        if HAS_HTTPX:
+            self.session = httpx.Client(
+                http2=HAS_H2,
+                headers={'User-Agent': self.user_agent},
+                timeout=30.0,
+                follow_redirects=True,
+            )
+        else:
+            self.session = requests.Session()
+            self.session.headers.update({'User-Agent': self.user_agent})
+
+        # LRU cache of fetched pages as (gzipped body, encoding), see
+        # _cache_get/_cache_put. Bodies stay bytes so lxml parses them
+        # directly without a decode/re-encode round trip.
+        self._cache: 'OrderedDict[str, Tuple[bytes, Optional[str]]]' = OrderedDict()
+
+        # Last parsed document, reused while the same HTML keeps coming back
+        # (test_multiple, find_best_selector, interactive_session)
+        self._parsed_html: Optional[Tuple[Union[str, bytes], Optional[str]]] = None
+        self._parsed: Optional['Selector'] = None
+
+    def close(self):
+        """Close the HTTP session and its pooled connections."""
+        session = getattr(self, 'session', None)
+        if session is not None:
+            session.close()
+            self.session = None
+
+    def __del__(self):
+        self.close()
 
     def fetch(self, url: str, use_cache: bool = True, timeout: int = 30) -> str:
         """
@@ -68,29 +213,167 @@ class SelectorTester:
         Returns:
             HTML content
         """
-        if use_cache and url in self._cache:
-            return self._cache[url]
+        return _decode(*self.fetch_bytes(url, use_cache=use_cache, timeout=timeout))
 
-        response = self.session.get(url, timeout=timeout)
-        response.raise_for_status()
-        html = response.text
+    def fetch_bytes(
+        self, url: str, use_cache: bool = True, timeout: int = 30
+    ) -> Tuple[bytes, Optional[str]]:
+        """
+        Fetch a page as raw bytes.
+
+        Args:
+            url: URL to fetch
+            use_cache: Whether to use cached content
+            timeout: Request timeout
+
+        Returns:
+            (body, encoding) - the encoding the HTTP client determined for the body
+        """
+        # Interned: the same URL keys the cache on every repeat fetch
+        url = sys.intern(url)
+
+        if use_cache:
+            page = self._cache_get(url)
+            if page is not None:
+                return page
+
+        page = self._download(url, timeout)
 
         if use_cache:
-            self._cache[url] = html
+            self._cache_put(url, *page)
 
-        return html
+        return page
+
+    def _download(self, url: str, timeout: int) -> Tuple[bytes, Optional[str]]:
+        """
+        Download a page as (body, encoding), parsing it on the way in.
+
+        When the encoding is known from the response headers the body is
+        streamed through _parse_stream, and the resulting Selector becomes
+        the last parsed document, so the first query on the page does not
+        parse it again.
+        """
+        if HAS_HTTPX:
+            with self.session.stream('GET', url, timeout=timeout) as response:
+                response.raise_for_status()
+                # httpx falls back to utf-8 when no charset is declared
+                encoding = response.encoding
+                body, parsed = _parse_stream(response.iter_bytes(STREAM_CHUNK_SIZE), encoding)
+        else:
+            with self.session.get(url, timeout=timeout, stream=True) as response:
+                response.raise_for_status()
+                encoding = response.encoding
+                if encoding:
+                    body, parsed = _parse_stream(response.iter_content(STREAM_CHUNK_SIZE), encoding)
+                else:
+                    # Without a header charset it is detected from the whole body
+                    body, parsed = response.content, None
+                    encoding = response.apparent_encoding
+
+        if parsed is not None:
+            self._parsed_html = (body, encoding)
+            self._parsed = parsed
+        return body, encoding
+
+    def fetch_many(self, urls: List[str], use_cache: bool = True, timeout: int = 30) -> Dict[str, str]:
+        """
+        Fetch HTML from several URLs.
+
+        With aiohttp installed the downloads run concurrently (up to
+        FETCH_MANY_CONNECTIONS at a time); otherwise they go through fetch()
+        one after another.
+
+        Args:
+            urls: URLs to fetch
+            use_cache: Whether to use and fill the HTML cache
+            timeout: Per-request timeout
+
+        Returns:
+            Dict mapping each URL to its HTML content
+        """
+        pages = {}
+        if use_cache:
+            for url in urls:
+                page = self._cache_get(url)
+                if page is not None:
+                    pages[url] = _decode(*page)
+        missing = [url for url in dict.fromkeys(urls) if url not in pages]
+
+        if not HAS_AIOHTTP:
+            for url in missing:
+                pages[url] = self.fetch(url, use_cache=use_cache, timeout=timeout)
+            return pages
+
+        fetched = asyncio.run(self._gather(missing, timeout))
+        for url, (body, encoding) in zip(missing, fetched):
+            pages[url] = _decode(body, encoding)
+            if use_cache:
+                self._cache_put(url, body, encoding)
+        return pages
+
+    async def _gather(self, urls: List[str], timeout: int) -> List[Tuple[bytes, Optional[str]]]:
+        """Download urls concurrently over one aiohttp session."""
+        connector = aiohttp.TCPConnector(limit=FETCH_MANY_CONNECTIONS)
+        async with aiohttp.ClientSession(
+            headers={'User-Agent': self.user_agent},
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as session:
+            return await asyncio.gather(*(self._afetch(session, url) for url in urls))
+
+    async def _afetch(self, session, url: str) -> Tuple[bytes, Optional[str]]:
+        """Fetch one URL on an aiohttp session, as (body, encoding)."""
+        async with session.get(url) as response:
+            response.raise_for_status()
+            body = await response.read()
+            return body, response.get_encoding()
+
+    def _cache_get(self, url: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        """Cached (body, encoding) for a URL, or None."""
+        entry = self._cache.get(url)
+        if entry is None:
+            return None
+        self._cache.move_to_end(url)
+        data, encoding = entry
+        return gzip.decompress(data), encoding
+
+    def _cache_put(self, url: str, body: bytes, encoding: Optional[str]):
+        """Cache a page body, compressed, evicting the least recently used page when full."""
+        self._cache[url] = (gzip.compress(body, compresslevel=CACHE_COMPRESSLEVEL), encoding)
+        self._cache.move_to_end(url)
+        if len(self._cache) > CACHE_MAXSIZE:
+            self._cache.popitem(last=False)
 
     def clear_cache(self):
         """Clear the HTML cache."""
         self._cache.clear()
+        self._parsed_html = None
+        self._parsed = None
+
+    def _get_selector(self, html: Union[str, bytes], encoding: Optional[str] = None) -> 'Selector':
+        """
+        Parse a page into a Selector, reusing the last parse for the same document.
+
+        html may be text, or raw bytes in the given encoding, which lxml
+        parses without decoding them first.
+        """
+        key = (html, encoding)
+        if key != self._parsed_html:
+            if isinstance(html, bytes) and html:
+                self._parsed = Selector(body=html, encoding=encoding or 'utf-8')
+            else:
+                self._parsed = Selector(text=_decode(html, encoding) if isinstance(html, bytes) else html)
+            self._parsed_html = key
+        return self._parsed
 
     def test_css(
         self,
         selector: str,
         url: str = None,
-        html: str = None,
+        html: Union[str, bytes] = None,
         base_url: str = None,
-        limit: int = 20
+        limit: int = 20,
+        parsed: 'Selector' = None
     ) -> Dict[str, Any]:
         """
         Test a CSS selector.
@@ -98,34 +381,43 @@ class SelectorTester:
         Args:
             selector: CSS selector to test
             url: URL to fetch and test against (optional if html provided)
-            html: HTML content to test against (optional if url provided)
+            html: HTML content (text or bytes) to test against (optional if url provided)
             base_url: Base URL for resolving relative links
             limit: Maximum results to return
+            parsed: Already parsed page to test against (skips url/html)
 
         Returns:
             Dict with 'matches', 'count', and 'errors'
         """
-        if not html and not url:
+        # Interned so repeat tests share one string in their result dicts
+        selector = sys.intern(selector)
+
+        if parsed is None and not html and not url:
             return {'error': 'Must provide either url or html', 'matches': [], 'count': 0}
 
+        encoding = None
         try:
-            if url and not html:
-                html = self.fetch(url)
-                base_url = base_url or url
-
-            sel = Selector(text=html)
+            sel = parsed
+            if sel is None:
+                if url and not html:
+                    html, encoding = self.fetch_bytes(url)
+                    base_url = base_url or url
+                sel = self._get_selector(html, encoding)
             matches = sel.css(selector).getall()
+            total = len(matches)
+            matches = matches[:limit]
 
-            # Resolve relative URLs if they look like hrefs
+            # Resolve relative URLs if they look like hrefs (urljoin leaves
+            # absolute URLs as they are); only the returned ones are resolved
             if base_url and matches and matches[0].startswith(('/', '.', 'http')):
-                matches = [urljoin(base_url, m) if not m.startswith('http') else m for m in matches]
+                matches = [urljoin(base_url, m) for m in matches]
 
             return {
                 'selector': selector,
                 'selector_type': 'css',
-                'count': len(matches),
-                'matches': matches[:limit],
-                'truncated': len(matches) > limit,
+                'count': total,
+                'matches': matches,
+                'truncated': total > limit,
                 'error': None,
             }
 
@@ -142,9 +434,10 @@ class SelectorTester:
         self,
         xpath: str,
         url: str = None,
-        html: str = None,
+        html: Union[str, bytes] = None,
         base_url: str = None,
-        limit: int = 20
+        limit: int = 20,
+        parsed: 'Selector' = None
     ) -> Dict[str, Any]:
         """
         Test an XPath selector.
@@ -152,34 +445,43 @@ class SelectorTester:
         Args:
             xpath: XPath expression to test
             url: URL to fetch and test against
-            html: HTML content to test against
+            html: HTML content (text or bytes) to test against
             base_url: Base URL for resolving relative links
             limit: Maximum results to return
+            parsed: Already parsed page to test against (skips url/html)
 
         Returns:
             Dict with 'matches', 'count', and 'errors'
         """
-        if not html and not url:
+        # Interned as for test_css; it is also the _compile_xpath cache key
+        xpath = sys.intern(xpath)
+
+        if parsed is None and not html and not url:
             return {'error': 'Must provide either url or html', 'matches': [], 'count': 0}
 
+        encoding = None
         try:
-            if url and not html:
-                html = self.fetch(url)
-                base_url = base_url or url
-
-            sel = Selector(text=html)
-            matches = sel.xpath(xpath).getall()
-
-            # Resolve relative URLs
+            sel = parsed
+            if sel is None:
+                if url and not html:
+                    html, encoding = self.fetch_bytes(url)
+                    base_url = base_url or url
+                sel = self._get_selector(html, encoding)
+            matches = _xpath_getall(sel, xpath)
+            total = len(matches)
+            matches = matches[:limit]
+
+            # Resolve relative URLs (urljoin leaves absolute URLs as they are);
+            # only the returned ones are resolved
             if base_url and matches and matches[0].startswith(('/', '.')):
-                matches = [urljoin(base_url, m) if not m.startswith('http') else m for m in matches]
+                matches = [urljoin(base_url, m) for m in matches]
 
             return {
                 'selector': xpath,
                 'selector_type': 'xpath',
-                'count': len(matches),
-                'matches': matches[:limit],
-                'truncated': len(matches) > limit,
+                'count': total,
+                'matches': matches,
+                'truncated': total > limit,
                 'error': None,
             }
 
@@ -196,7 +498,7 @@ class SelectorTester:
         self,
         selectors: List[str],
         url: str = None,
-        html: str = None,
+        html: Union[str, bytes] = None,
         selector_type: str = 'css',
         limit: int = 10
     ) -> List[Dict[str, Any]]:
@@ -206,23 +508,25 @@ class SelectorTester:
         Args:
             selectors: List of selectors to test
             url: URL to test against
-            html: HTML content to test against
+            html: HTML content (text or bytes) to test against
             selector_type: 'css' or 'xpath'
             limit: Max results per selector
 
         Returns:
             List of result dicts
         """
-        # Fetch once
+        # Fetch and parse once
+        encoding = None
         if url and not html:
-            html = self.fetch(url)
+            html, encoding = self.fetch_bytes(url)
+        parsed = self._get_selector(html, encoding)
 
         results = []
         for selector in selectors:
             if selector_type == 'xpath':
-                result = self.test_xpath(xpath=selector, html=html, base_url=url, limit=limit)
+                result = self.test_xpath(xpath=selector, base_url=url, limit=limit, parsed=parsed)
             else:
-                result = self.test_css(selector=selector, html=html, base_url=url, limit=limit)
+                result = self.test_css(selector=selector, base_url=url, limit=limit, parsed=parsed)
             results.append(result)
 
         return results
@@ -230,18 +534,24 @@ class SelectorTester:
     def find_best_selector(
         self,
         url: str = None,
-        html: str = None,
+        html: Union[str, bytes] = None,
         target_pattern: str = None,
-        candidates: List[str] = None
+        candidates: List[str] = None,
+        early_exit: Optional[int] = 10
     ) -> Optional[str]:
         """
         Find the best working selector from a list of candidates.
 
+        Candidates are tried most specific first. The first one with at
+        least early_exit matches is returned without waiting on the rest;
+        otherwise the candidate with the most matches wins.
+
         Args:
             url: URL to test against
-            html: HTML content to test against
+            html: HTML content (text or bytes) to test against
             target_pattern: Optional pattern that matches should contain
             candidates: List of candidate selectors
+            early_exit: Match count that is good enough (None to test all)
 
         Returns:
             Best selector or None
@@ -257,29 +567,54 @@ class SelectorTester:
                 'a[href*="/product"]::attr(href)',
             ]
 
+        encoding = None
         if url and not html:
-            html = self.fetch(url)
+            html, encoding = self.fetch_bytes(url)
+
+        # Parse up front so every candidate reuses the same tree; the pool
+        # threads then only read it
+        parsed = self._get_selector(html, encoding)
+
+        # One pass over the tree with every candidate fused into a selector
+        # group: if even the union matches nothing, no candidate can win. An
+        # error (e.g. one invalid candidate) falls through to the full scan.
+        union = self.test_css(selector=', '.join(candidates), parsed=parsed, limit=0)
+        if not union.get('error') and union.get('count', 0) == 0:
+            return None
+
+        candidates = sorted(candidates, key=_specificity)
 
         best = None
         best_count = 0
 
-        for selector in candidates:
-            result = self.test_css(selector=selector, html=html, base_url=url)
+        with ThreadPoolExecutor(max_workers=min(FIND_BEST_WORKERS, len(candidates))) as executor:
+            futures = [
+                executor.submit(self.test_css, selector=selector, base_url=url, parsed=parsed)
+                for selector in candidates
+            ]
 
-            if result.get('error'):
-                continue
+            for selector, future in zip(candidates, futures):
+                result = future.result()
+                if result.get('error'):
+                    continue
+
+                count = result.get('count', 0)
 
-            count = result.get('count', 0)
+                # If target pattern specified, check matches
+                if target_pattern and count > 0:
+                    matches = result.get('matches', [])
+                    matching = [m for m in matches if target_pattern in m]
+                    count = len(matching)
 
-            # If target pattern specified, check matches
-            if target_pattern and count > 0:
-                matches = result.get('matches', [])
-                matching = [m for m in matches if target_pattern in m]
-                count = len(matching)
+                if early_exit and count >= early_exit:
+                    # Candidates that have not started yet are dropped
+                    for pending in futures:
+                        pending.cancel()
+                    return selector
 
-            if count > best_count:
-                best_count = count
-                best = selector
+                if count > best_count:
+                    best_count = count
+                    best = selector
 
         return best
 
@@ -299,7 +634,7 @@ class SelectorTester:
         print(f"{'='*60}\n")
 
         try:
-            html = self.fetch(url)
+            parsed = self._get_selector(*self.fetch_bytes(url))
             print("Page loaded successfully!\n")
         except Exception as e:
             print(f"Error loading page: {e}")
@@ -326,9 +661,9 @@ class SelectorTester:
             cmd, selector = parts
 
             if cmd.lower() == 'css':
-                result = self.test_css(selector=selector, html=html, base_url=url)
+                result = self.test_css(selector=selector, base_url=url, parsed=parsed)
             elif cmd.lower() == 'xpath':
-                result = self.test_xpath(xpath=selector, html=html, base_url=url)
+                result = self.test_xpath(xpath=selector, base_url=url, parsed=parsed)
             else:
                 print(f"Unknown command: {cmd}. Use 'css' or 'xpath'")
                 continue